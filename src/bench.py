@@ -0,0 +1,238 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+"""
+로봇과 카메라 없이 실행하는 성능 측정
+예) python src/bench.py --duration 3 --output bench.json
+"""
+
+import argparse
+import json
+import logging
+import os
+import time
+
+import numpy as np
+
+from threads import CameraThread, SerialThread
+from threads.protocol import build_motion, encode_motion
+from threads.serial_thread import RpyParser
+from threads.sources import SyntheticCamera
+from utils import Events, FrameResizer, geometry, resize_image
+from utils.pipeline import DEFAULT_PIPELINE, Pipeline
+from utils.tracker import RoiTracker
+from utils.startup import lazy_import
+
+cv2 = lazy_import('cv2')
+
+
+def bench_capture(duration, width, height, fps):
+    """CameraThread 의 실제 캡처 fps (SyntheticCamera 사용)"""
+    result = {}
+    for realtime in (True, False):
+        events = Events()
+        camera = SyntheticCamera(width, height, fps, realtime=realtime)
+        thread = CameraThread(events, 'CameraThread', width, height, fps if realtime else 0, source=camera)
+        time.sleep(duration)
+        frames = thread.frames.frame_id
+        thread.do_stop()
+        thread.join()
+
+        key = 'realtime' if realtime else 'unthrottled'
+        result[key] = {
+            'configured_fps': fps if realtime else None,
+            'fps': frames / duration,
+            'dropped': thread.dropped_frames,
+        }
+    return result
+
+
+def bench_display(iterations, width, height, display_width, display_height):
+    """화면 출력용 크기 변경 + 색 변환 비용"""
+    _, frame = SyntheticCamera(width, height, realtime=False).read()
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        img = resize_image(frame, display_width, display_height)
+        cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+    legacy = (time.perf_counter() - start) / iterations
+
+    resizer = FrameResizer(display_width, display_height)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        resizer.convert(frame)
+    reused = (time.perf_counter() - start) / iterations
+
+    return {
+        'resize_image_us': legacy * 1e6,
+        'frame_resizer_us': reused * 1e6,
+    }
+
+
+def bench_pipeline(iterations, width, height):
+    """기본 비전 파이프라인의 단계별 처리 시간"""
+    _, frame = SyntheticCamera(width, height, realtime=False).read()
+
+    pipeline = Pipeline.from_config(DEFAULT_PIPELINE)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        pipeline(frame)
+    total = (time.perf_counter() - start) / iterations
+
+    result = {'total_us': total * 1e6}
+    for stage in pipeline.stages:
+        result['{}_us'.format(stage.name)] = pipeline.timing.histogram(stage.name).summary()['mean'] * 1e6
+    return result
+
+
+def bench_geometry(iterations, count):
+    """count x count 상자 쌍의 최소 거리 행렬 계산 비용"""
+    boxes = np.random.RandomState(0).rand(count, 4, 2) * 320
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        geometry.min_distances(boxes, boxes)
+    elapsed = (time.perf_counter() - start) / iterations
+
+    return {
+        'boxes': count,
+        'min_distances_us': elapsed * 1e6,
+    }
+
+
+def bench_tracker(frames, width, height):
+    """움직이는 공을 매 프레임 전체 검색할 때와 ROI 로 추적할 때의 비용"""
+    background = np.random.RandomState(0).randint(0, 60, (height, width, 3)).astype(np.uint8)
+    images = []
+    for idx in range(frames):
+        image = background.copy()
+        x = int(width * 0.1 + (width * 0.8) * idx / frames)
+        y = int(height / 2 + height / 4 * np.sin(idx / 20.0))
+        cv2.circle(image, (x, y), max(height // 24, 4), (0, 128, 255), -1)
+        images.append(image)
+
+    config = [dict(stage) for stage in DEFAULT_PIPELINE if stage['stage'] != 'resize']
+    full = Pipeline.from_config(config)
+    start = time.perf_counter()
+    for image in images:
+        full(image)
+    full_frame = (time.perf_counter() - start) / frames
+
+    tracker = RoiTracker(Pipeline.from_config(config))
+    for idx, image in enumerate(images):
+        tracker.update(image, idx / 30.0)
+    stats = tracker.get_stats()
+
+    return {
+        'full_frame_ms': full_frame * 1000,
+        'tracked_ms': stats['frame_ms'],
+        'hit_rate': stats['hit_rate'],
+        'redetects': stats['redetects'],
+    }
+
+
+def bench_parse(frames):
+    """RPY 스트림 파싱 처리량 (손상된 바이트 1% 포함)"""
+    rng = np.random.RandomState(0)
+    data = np.tile(np.array([255, 10, 20, 30, 254], dtype=np.uint8), frames)
+    noise = rng.randint(0, len(data), len(data) // 100)
+    data[noise] = rng.randint(0, 254, len(noise))
+    data = data.tobytes()
+
+    # 손상된 프레임마다 남기는 로그는 측정에서 제외
+    logging.disable(logging.ERROR)
+    parser = RpyParser()
+    start = time.perf_counter()
+    for pos in range(0, len(data), 64):
+        parser.feed(data[pos:pos + 64])
+    elapsed = time.perf_counter() - start
+    logging.disable(logging.NOTSET)
+
+    return {
+        'frames_per_sec': parser.frames / elapsed,
+        'mb_per_sec': len(data) / elapsed / 1e6,
+        'parsed': parser.frames,
+        'corrupt': parser.corrupt,
+    }
+
+
+def bench_command(count, baudrate, rate):
+    """send_data 호출부터 가상 로봇이 프레임을 받을 때까지의 지연"""
+    from threads.virtual_robot import VirtualRobot
+
+    robot = VirtualRobot(rate=rate)
+    robot.start()
+
+    events = Events()
+    thread = SerialThread(events, 'SerialThread', port=robot.port, baudrate=baudrate, timeout=0.1)
+    time.sleep(0.2)
+
+    frame = encode_motion(build_motion([0] * 14))
+    latencies = []
+    for _ in range(count):
+        received = len(robot.commands)
+        start = time.monotonic()
+        thread.send_data(frame)
+        deadline = start + 1.0
+        while len(robot.commands) == received and time.monotonic() < deadline:
+            time.sleep(0.0002)
+        if len(robot.commands) > received:
+            latencies.append(robot.commands[-1][0] - start)
+
+    rpy_samples = thread.history.count
+    thread.do_stop()
+    thread.join()
+    robot.close()
+
+    latencies = np.array(latencies) * 1000
+    return {
+        'received': len(latencies),
+        'p50_ms': float(np.percentile(latencies, 50)) if len(latencies) else None,
+        'p95_ms': float(np.percentile(latencies, 95)) if len(latencies) else None,
+        'max_ms': float(latencies.max()) if len(latencies) else None,
+        'rpy_samples': rpy_samples,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark capture, display, serial parse and command latency')
+    parser.add_argument('--duration', type=float, default=2.0, help='capture benchmark seconds')
+    parser.add_argument('--width', type=int, default=640)
+    parser.add_argument('--height', type=int, default=480)
+    parser.add_argument('--fps', type=int, default=30)
+    parser.add_argument('--iterations', type=int, default=500, help='display conversion iterations')
+    parser.add_argument('--frames', type=int, default=200000, help='RPY frames to parse')
+    parser.add_argument('--commands', type=int, default=200, help='commands to send to the virtual robot')
+    parser.add_argument('--baudrate', type=int, default=115200)
+    parser.add_argument('--output', default=None, help='write results as JSON')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    results = {
+        'capture': bench_capture(args.duration, args.width, args.height, args.fps),
+        'display': bench_display(args.iterations, args.width, args.height, 320, 240),
+        'pipeline': bench_pipeline(args.iterations, args.width, args.height),
+        'geometry': bench_geometry(args.iterations, 20),
+        'tracker': bench_tracker(args.iterations, args.width, args.height),
+        'parse': bench_parse(args.frames),
+    }
+    if os.name == 'posix':
+        results['command'] = bench_command(args.commands, args.baudrate, 100)
+
+    for name, values in results.items():
+        print('[{}]'.format(name))
+        for key, value in values.items():
+            if isinstance(value, dict):
+                value = ', '.join('{}={}'.format(k, round(v, 2) if isinstance(v, float) else v)
+                                  for k, v in value.items())
+            elif isinstance(value, float):
+                value = round(value, 2)
+            print('  {:<20} {}'.format(key, value))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
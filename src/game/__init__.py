@@ -1 +1,4 @@
+from game.compiler import MacroCompileError, MacroPlan, Step, compile_macro
 from game.macro import MacroThread
+from game.motion_library import MotionLibrary
+from game.speech import Speech, SpeechError
@@ -0,0 +1,84 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+import logging
+from collections import namedtuple
+
+from game.speech import SpeechError
+from threads.protocol import MotionFrameError, encode_motion
+
+# deadline: 매크로 시작 시각 기준 실행 시각(초)
+Step = namedtuple('Step', ['deadline', 'command', 'name', 'payload'])
+MacroPlan = namedtuple('MacroPlan', ['steps', 'duration'])
+
+
+class MacroCompileError(ValueError):
+    pass
+
+
+def compile_motion(item, speech):
+    try:
+        return encode_motion(item['data'])
+    except (MotionFrameError, TypeError) as e:
+        raise MacroCompileError('Invalid motion "{}": {}'.format(item.get('name'), e))
+
+
+def compile_delay(item):
+    try:
+        delay = float(item['data'])
+    except (TypeError, ValueError):
+        raise MacroCompileError('Invalid delay: {}'.format(item['data']))
+    if delay < 0:
+        raise MacroCompileError('Delay must not be negative: {}'.format(delay))
+    return delay
+
+
+def compile_tts(item, speech):
+    if speech is None:
+        raise MacroCompileError('TTS is not available')
+    if not isinstance(item['data'], str) or not item['data']:
+        raise MacroCompileError('Invalid tts text: {}'.format(item['data']))
+
+    # 실행 전에 합성해서 캐시에 저장하고, 실행 계획에는 wav 파일 경로만 남김
+    try:
+        return speech.prepare(item['data'])
+    except SpeechError as e:
+        raise MacroCompileError('TTS error "{}": {}'.format(item['data'], e))
+
+
+# 실행 단계를 만드는 명령어와 payload 변환 함수
+COMMANDS = {
+    'motion': compile_motion,
+    'tts': compile_tts,
+}
+
+
+def compile_macro(data, speech=None):
+    """
+    매크로 데이터를 실행 계획으로 변환
+    - 체크되지 않은 단계는 제외
+    - motion 은 전송용 bytes 로, tts 는 합성된 wav 경로로, delay 는 이후 단계의 deadline 으로 변환
+    - 알 수 없는 명령어(예: 이전 형식의 speech)는 이전 MacroThread 처럼 경고만 남기고 건너뜀
+    - 잘못된 값이 있으면 실행 전에 MacroCompileError
+    :param data: MacroWidget.macroData 형식의 목록
+    :param speech: tts 명령에 사용할 game.speech.Speech
+    :return: MacroPlan
+    """
+    steps = []
+    deadline = 0.0
+
+    for idx, item in enumerate(data):
+        if item.get('checked') is False:
+            continue
+
+        command = item.get('command')
+        if command == 'delay':
+            deadline += compile_delay(item)
+            continue
+
+        if command not in COMMANDS:
+            logging.warning('Skip unknown command "{}" at step {}'.format(command, idx + 1))
+            continue
+        steps.append(Step(deadline, command, item.get('name'), COMMANDS[command](item, speech)))
+
+    return MacroPlan(tuple(steps), deadline)
@@ -3,46 +3,134 @@
 
 import logging
 import time
-from threading import Thread
+from threading import Thread, Event
+
+from game.compiler import MacroCompileError, compile_macro
 
 
 class MacroThread(Thread):
+    """
+    매크로 실행 스레드
+    - 시작 전에 매크로를 실행 계획(MacroPlan)으로 컴파일하므로 실행 중에는 데이터를 해석하지 않음
+    - 컴파일은 tts 문장 합성 때문에 오래 걸릴 수 있으므로 compile() 을 따로 부르지 않았으면 이 스레드에서 함
+    - 각 단계의 실행 시각은 매크로 시작 시각 기준 절대 deadline (monotonic 시계 기준)
+      이므로 단계가 늘어나도 오차가 쌓이지 않음
+    - stop/pause 는 Event 로 대기하므로 바로 반영
+    - 단계별 계획 시각과 실제 시각은 timing 에 기록
+    """
 
-    def __init__(self, parent):
+    def __init__(self, parent, speech=None):
         Thread.__init__(self)
         self.parent = parent
         self.camera = parent.camera_thread
         self.serial = parent.serial_thread
+        self.speech = speech
 
-        self.__do_stop = False
         self.data = None
+        self.plan = None
+        self.timing = []
+        self.handlers = {
+            'motion': self.run_motion,
+            'tts': self.run_tts,
+        }
+
+        self._stop_event = Event()
+        self._resume_event = Event()
+        self._resume_event.set()
+        self._start = None
 
     def stop(self):
-        self.__do_stop = True
+        self._stop_event.set()
+        self._resume_event.set()
+        if self.speech is not None:
+            self.speech.stop()
+
+    def pause(self):
+        self._resume_event.clear()
+
+    def resume(self):
+        self._resume_event.set()
+
+    @property
+    def stopped(self):
+        return self._stop_event.is_set()
 
     def set_data(self, data):
+        """
+        :param data: MacroWidget.macroData 형식의 목록
+        """
         self.data = data
+        self.plan = None
+
+    def compile(self):
+        """
+        set_data() 로 받은 매크로를 컴파일, 아직 합성되지 않은 tts 문장은 여기서 합성
+        :raise MacroCompileError: 잘못된 매크로
+        """
+        self.plan = compile_macro(self.data, self.speech)
+
+    def wait_until(self, deadline):
+        """
+        deadline 까지 대기, 일시 정지된 시간만큼 시작 시각을 뒤로 미룸
+        :param deadline: 매크로 시작 시각 기준 오프셋(초)
+        :return: 중지되었으면 False
+        """
+        while not self.stopped:
+            if not self._resume_event.is_set():
+                paused = time.monotonic()
+                self._resume_event.wait()
+                self._start += time.monotonic() - paused
+                continue
+
+            remaining = self._start + deadline - time.monotonic()
+            if remaining <= 0:
+                return True
+            self._stop_event.wait(remaining)
+
+        return False
+
+    def run_motion(self, step):
+        self.serial.send_data(step.payload)
+
+    def run_tts(self, step):
+        # 재생은 Speech 스레드에서 하므로 다음 단계는 기다리지 않음
+        self.speech.play(step.payload)
 
     def run(self):
         if self.data is None:
             return
+        if self.plan is None:
+            try:
+                self.compile()
+            except MacroCompileError as e:
+                logging.error('Macro error: {}'.format(e))
+                self.parent.macro_finished.emit()
+                return
+
+        self.timing = []
+        self._start = time.monotonic()
 
-        for item in self.data:
-            if self.__do_stop:
+        for step in self.plan.steps:
+            if not self.wait_until(step.deadline):
                 break
 
-            if item['checked'] is False:
-                continue
+            actual = time.monotonic() - self._start
+            self.handlers[step.command](step)
+            self.timing.append({
+                'name': step.name,
+                'command': step.command,
+                'planned': step.deadline,
+                'actual': actual,
+            })
+            logging.info('Macro step "{}" planned {:.3f}s, actual {:.3f}s ({:+.1f}ms)'.format(
+                step.name, step.deadline, actual, (actual - step.deadline) * 1000))
+        else:
+            # 마지막 delay 까지 기다린 뒤 종료
+            self.wait_until(self.plan.duration)
 
-            if item['command'] == 'delay':
-                logging.info(item)
-                for i in range(int(item['data'])):
-                    if self.__do_stop:
-                        break
-                    time.sleep(1)
-            elif item['command'] == 'motion':
-                logging.info(item)
-                self.serial.send_data(item['data'])
-
-        logging.info('Macro finished')
-        self.parent.macro.update_widget(False)
+        if self.timing:
+            worst = max(abs(step['actual'] - step['planned']) for step in self.timing)
+            logging.info('Macro finished, max timing error {:.1f}ms'.format(worst * 1000))
+        else:
+            logging.info('Macro finished')
+        self.parent.macro_finished.emit()
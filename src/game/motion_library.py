@@ -0,0 +1,174 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+import json
+import logging
+import os
+from collections import OrderedDict
+
+from threads.protocol import MotionFrameError, encode_motion
+from utils.events import Signal
+from utils.file_control import store, load_value, save_value
+
+EMPTY_NAME = '-'
+INIT_DATA = [255, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 254, 254]
+
+# 저널이 이 줄 수를 넘으면 kinematic.json 에 합쳐서 다시 기록
+COMPACT_THRESHOLD = 256
+
+
+def slot_key(row, col):
+    return '{:02d}_{:02d}'.format(row, col)
+
+
+class MotionLibrary:
+    """
+    kinematic 버튼에 저장된 동작 모음
+    - slot(key) -> 동작, 이름 -> slot 색인을 유지하므로 이름 검색에 전체를 훑지 않음
+    - 동작마다 검증한 전송용 bytes 를 캐시
+    - 변경은 data/<namespace>.journal 에 한 줄씩 덧붙이고, 저널이 길어지거나 close() 할 때만
+      전체를 data/<namespace>.json 에 기록
+    - 변경되면 changed 신호로 (key, 이전 이름, 새 동작) 을 전달
+    """
+
+    def __init__(self, rows, cols, namespace='kinematic', compact_threshold=COMPACT_THRESHOLD):
+        self.rows, self.cols = rows, cols
+        self.namespace = namespace
+        self.journal_name = os.path.join(store.data_dir, '{}.journal'.format(namespace))
+        self.compact_threshold = compact_threshold
+
+        self.changed = Signal()
+
+        self.slots = OrderedDict()
+        self.frames = {}
+        self._names = {}
+        self._journal = None
+        self._journal_lines = 0
+
+        self.load()
+
+    def load(self):
+        motions = load_value(self.namespace, 'button_motions', {})
+        missing = False
+        for row in range(self.rows):
+            for col in range(self.cols):
+                key = slot_key(row, col)
+                motion = motions.get(key)
+                if not isinstance(motion, dict) or 'name' not in motion or 'data' not in motion:
+                    motion = {'name': EMPTY_NAME, 'data': [], 'shortcut': None}
+                    missing = True
+                self.slots[key] = motion
+
+        # 마지막 전체 기록 이후의 변경을 반영
+        try:
+            with open(self.journal_name) as journal:
+                for line in journal:
+                    try:
+                        key, motion = json.loads(line)
+                    except ValueError:
+                        # 기록 중에 끊긴 마지막 줄
+                        logging.error('Broken motion journal entry: {}'.format(line.strip()))
+                        continue
+                    if key in self.slots:
+                        self.slots[key] = motion
+                    self._journal_lines += 1
+        except FileNotFoundError:
+            pass
+
+        for key, motion in self.slots.items():
+            self._index(key, motion)
+
+        if missing or self._journal_lines:
+            self.compact()
+
+    def _index(self, key, motion):
+        self.frames[key] = None
+        if motion['name'] == EMPTY_NAME:
+            return
+
+        self._names.setdefault(motion['name'], []).append(key)
+        self._names[motion['name']].sort()
+        try:
+            self.frames[key] = encode_motion(motion['data'])
+        except MotionFrameError as e:
+            logging.error('Invalid motion "{}": {}'.format(motion['name'], e))
+
+    def _unindex(self, key, motion):
+        keys = self._names.get(motion['name'])
+        if keys and key in keys:
+            keys.remove(key)
+            if not keys:
+                del self._names[motion['name']]
+        self.frames[key] = None
+
+    def get(self, key):
+        return self.slots[key]
+
+    def frame(self, key):
+        """:return: 전송용 bytes, 비어 있거나 잘못된 동작이면 None"""
+        return self.frames.get(key)
+
+    def find(self, name):
+        """:return: 이름이 name 인 마지막 slot key (slot 순서), 없으면 None"""
+        keys = self._names.get(name)
+        return keys[-1] if keys else None
+
+    def by_name(self, name):
+        key = self.find(name)
+        return self.slots[key] if key is not None else None
+
+    def names(self):
+        """할당된 동작 이름 (slot 순서)"""
+        return [motion['name'] for motion in self.slots.values() if motion['name'] != EMPTY_NAME]
+
+    def is_empty(self, key):
+        return self.slots[key]['name'] == EMPTY_NAME
+
+    def set(self, key, name, data):
+        old = self.slots[key]
+        motion = {'name': name, 'data': list(data), 'shortcut': old.get('shortcut')}
+
+        self._unindex(key, old)
+        self.slots[key] = motion
+        self._index(key, motion)
+        self._append(key, motion)
+        self.changed.emit(key, old['name'], motion)
+
+    def clear(self, key):
+        self.set(key, EMPTY_NAME, INIT_DATA)
+
+    def _append(self, key, motion):
+        if self._journal_lines >= self.compact_threshold:
+            self.compact()
+            return
+
+        try:
+            if self._journal is None:
+                os.makedirs(os.path.dirname(self.journal_name) or '.', exist_ok=True)
+                self._journal = open(self.journal_name, 'a')
+            self._journal.write(json.dumps([key, motion]) + '\n')
+            self._journal.flush()
+            os.fsync(self._journal.fileno())
+            self._journal_lines += 1
+        except OSError:
+            logging.error('Failed to write motion journal: {}'.format(self.journal_name))
+            self.compact()
+
+    def compact(self):
+        """전체 동작을 설정 파일에 기록한 뒤 저널을 비움"""
+        save_value(self.namespace, 'button_motions', self.slots)
+        store.flush()
+
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+        if os.path.exists(self.journal_name):
+            os.remove(self.journal_name)
+        self._journal_lines = 0
+
+    def close(self):
+        if self._journal_lines:
+            self.compact()
+        elif self._journal is not None:
+            self._journal.close()
+            self._journal = None
@@ -0,0 +1,184 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+import hashlib
+import logging
+import os
+import queue
+import shutil
+import subprocess
+import sys
+import threading
+import wave
+
+CACHE_DIR = 'data/tts'
+
+
+class SpeechError(Exception):
+    pass
+
+
+class StubBackend:
+    """음성 대신 글자 수에 비례하는 길이의 무음 wav 를 만드는 테스트용 백엔드"""
+    name = 'stub'
+
+    def __init__(self, rate=16000, seconds_per_char=0.06):
+        self.rate = rate
+        self.seconds_per_char = seconds_per_char
+
+    def synthesize(self, text, voice, filename):
+        frames = int(self.rate * self.seconds_per_char * len(text))
+        with wave.open(filename, 'wb') as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(self.rate)
+            wav.writeframes(b'\x00\x00' * frames)
+
+
+class EspeakBackend:
+    """espeak / espeak-ng 명령어를 사용하는 오프라인 백엔드"""
+    name = 'espeak'
+
+    def __init__(self):
+        self.command = shutil.which('espeak-ng') or shutil.which('espeak')
+        if self.command is None:
+            raise SpeechError('espeak is not installed')
+
+    def synthesize(self, text, voice, filename):
+        args = [self.command, '-w', filename]
+        if voice:
+            args += ['-v', voice]
+        try:
+            # '-' 로 시작하는 문장이 옵션으로 해석되지 않도록 '--' 뒤에 넣음
+            subprocess.run(args + ['--', text], check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        except subprocess.CalledProcessError as e:
+            raise SpeechError('espeak failed: {}'.format(e.stderr.decode(errors='replace').strip()))
+
+
+class Pyttsx3Backend:
+    """pyttsx3 를 사용하는 오프라인 백엔드"""
+    name = 'pyttsx3'
+
+    def __init__(self):
+        try:
+            import pyttsx3
+        except ImportError:
+            raise SpeechError('pyttsx3 is not installed')
+        self.engine = pyttsx3.init()
+
+    def synthesize(self, text, voice, filename):
+        if voice:
+            self.engine.setProperty('voice', voice)
+        self.engine.save_to_file(text, filename)
+        self.engine.runAndWait()
+
+
+BACKENDS = {
+    StubBackend.name: StubBackend,
+    EspeakBackend.name: EspeakBackend,
+    Pyttsx3Backend.name: Pyttsx3Backend,
+}
+
+
+def play_command():
+    """현재 플랫폼에서 wav 파일을 재생하는 명령어"""
+    if sys.platform == 'darwin':
+        return ['afplay']
+    for command in (['aplay', '-q'], ['paplay'], ['ffplay', '-nodisp', '-autoexit', '-loglevel', 'quiet']):
+        if shutil.which(command[0]):
+            return command
+    return None
+
+
+class Speech:
+    """
+    tts 명령 처리
+    - 문장은 (backend, voice, text) 를 키로 data/tts 에 wav 로 한 번만 합성해서 저장
+    - 재생은 별도 스레드에서 순서대로 하므로 play() 는 바로 반환
+    - stop() 은 대기 중인 재생을 취소하고 재생 중인 문장도 멈춤
+    """
+
+    def __init__(self, backend='stub', voice=None, cache_dir=CACHE_DIR, player=None):
+        try:
+            self.backend = BACKENDS[backend]()
+        except KeyError:
+            raise SpeechError('Unknown tts backend: {}'.format(backend))
+        self.voice = voice
+        self.cache_dir = cache_dir
+        self.player = player if player is not None else play_command()
+
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._thread = None
+        self._process = None
+
+    def filename(self, text):
+        key = '{}\0{}\0{}'.format(self.backend.name, self.voice or '', text)
+        digest = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, '{}.wav'.format(digest))
+
+    def prepare(self, text):
+        """
+        문장을 합성해서 캐시에 저장
+        :return: wav 파일 경로
+        """
+        filename = self.filename(text)
+        with self._lock:
+            if os.path.exists(filename):
+                return filename
+
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_name = '{}.tmp.wav'.format(filename[:-4])
+            try:
+                self.backend.synthesize(text, self.voice, tmp_name)
+                os.replace(tmp_name, filename)
+            finally:
+                if os.path.exists(tmp_name):
+                    os.remove(tmp_name)
+
+        logging.debug('Synthesized speech: {}'.format(text))
+        return filename
+
+    def prefetch(self, texts):
+        """백그라운드에서 문장들을 미리 합성"""
+        def run():
+            for text in texts:
+                try:
+                    self.prepare(text)
+                except SpeechError as e:
+                    logging.error('TTS error: {}'.format(e))
+
+        threading.Thread(target=run, name='SpeechPrefetch', daemon=True).start()
+
+    def play(self, filename):
+        """재생 큐에 넣고 바로 반환"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run_player, name='SpeechPlayer', daemon=True)
+            self._thread.start()
+        self._queue.put(filename)
+
+    def stop(self):
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                break
+
+        process = self._process
+        if process is not None and process.poll() is None:
+            process.terminate()
+
+    def _run_player(self):
+        while True:
+            filename = self._queue.get()
+            if self.player is None:
+                logging.debug('No audio player, skip speech: {}'.format(filename))
+                continue
+            try:
+                self._process = subprocess.Popen(self.player + [filename],
+                                                 stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+                self._process.wait()
+            except OSError as e:
+                logging.error('Failed to play speech: {}'.format(e))
+            finally:
+                self._process = None
@@ -0,0 +1,246 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+"""
+Qt 없이 카메라, 시리얼, 매크로를 실행
+예) python src/headless.py --macro "magic rope" --camera
+"""
+
+import argparse
+import logging
+import signal
+import threading
+import time
+
+from game import MacroThread, MacroCompileError, Speech, SpeechError
+from threads import CameraGroup, SerialThread, SessionRecorder, TrackerThread, load_camera_configs
+from threads.replay import open_replay
+from utils import Events, load_value, flush_values
+from utils.pipeline import load_pipeline
+from utils.tracker import RoiTracker
+from utils.probe import probes
+
+logging_format = '[%(asctime)-15s][%(levelname)s] %(threadName)s %(message)s'
+
+
+class HeadlessRuntime(Events):
+    """DisplayWindowClass 대신 스레드의 parent 로 사용하는 런타임"""
+
+    def __init__(self):
+        super().__init__()
+        self.macro_thread = None
+        self.cameras = None
+        self.vision = None
+        self.tracker = None
+        self.recorder = None
+        self.replay = None
+        self.stop_handle = None
+        self.connected = threading.Event()
+        self.finished = threading.Event()
+
+        self.serial_connected.connect(self.connected.set)
+        self.serial_disconnected.connect(self.finished.set)
+        self.macro_finished.connect(self.finished.set)
+
+    def serial_connect(self, port):
+        if self.replay is not None:
+            port = self.replay[2]
+        self.serial_thread = SerialThread(
+            parent=self,
+            name='SerialThread',
+            port=port,
+            baudrate=load_value('serial', 'baudrate', 9600),
+            timeout=load_value('serial', 'timeout', 5),
+            delay=load_value('serial', 'delay', 1),
+            filter_tau=load_value('serial', 'filter_tau', None),
+            stop_frame=load_value('serial', 'stop_frame', None),
+        )
+
+    def serial_disconnect(self):
+        if self.serial_thread is not None:
+            self.serial_thread.do_stop()
+            self.serial_thread.join()
+            self.serial_thread = None
+
+    def replay_open(self, filename, speed):
+        """카메라와 시리얼 대신 기록된 세션을 재생"""
+        self.replay = open_replay(filename, speed)
+
+    def camera_connect(self):
+        configs = load_camera_configs()
+        sources = None
+        if self.replay is not None:
+            # 기록된 세션에는 카메라 하나만 있으므로 primary 카메라만 재생
+            primary = next(iter(configs))
+            configs = {primary: configs[primary]}
+            sources = {primary: self.replay[1]}
+            if not self.replay[1].clock.speed:
+                configs[primary]['fps'] = 0
+
+        self.cameras = CameraGroup(self, configs, sources=sources)
+        self.camera_thread = self.cameras.get()
+
+    def camera_disconnect(self):
+        if self.cameras is not None:
+            self.cameras.stop()
+            self.cameras = None
+            self.camera_thread = None
+
+    def vision_start(self):
+        """primary 카메라 프레임을 비전 작업 프로세스 풀로 처리"""
+        # multiprocessing.shared_memory 는 Python 3.8 이상에서만 사용 가능하므로 필요할 때만 import,
+        # 그보다 낮은 버전에서는 VisionPool 이 RuntimeError
+        from threads.vision_pool import VisionPool
+
+        self.vision = VisionPool(
+            workers=load_value('vision', 'workers', None),
+            slots=load_value('vision', 'slots', None),
+            target=load_pipeline(),
+        )
+        self.vision.attach(self.camera_thread)
+
+    def tracker_start(self):
+        """primary 카메라에서 한 물체를 ROI 로 추적"""
+        tracker = RoiTracker(
+            load_pipeline(),
+            padding=load_value('tracker', 'padding', 2.5),
+            min_roi=load_value('tracker', 'min_roi', 64),
+            max_misses=load_value('tracker', 'max_misses', 3),
+        )
+        self.tracker = TrackerThread(self.camera_thread, tracker)
+
+    def macro_start(self, name):
+        data = load_value('macro', name, None)
+        if data is None:
+            logging.error('Macro "{}" not found'.format(name))
+            return False
+
+        try:
+            speech = Speech(load_value('tts', 'backend', 'espeak'), load_value('tts', 'voice', None))
+        except SpeechError as e:
+            logging.error('TTS is not available, use silent stub: {}'.format(e))
+            speech = Speech('stub')
+
+        self.macro_thread = MacroThread(self, speech)
+        try:
+            self.macro_thread.set_data(data)
+            self.macro_thread.compile()
+        except MacroCompileError as e:
+            logging.error('Macro error: {}'.format(e))
+            return False
+
+        logging.info('Macro Start')
+        self.macro_thread.start()
+        return True
+
+    def record_start(self, filename):
+        self.recorder = SessionRecorder(filename, jpeg_quality=load_value('recorder', 'jpeg_quality', 90))
+        self.recorder.start()
+        self.recorder.attach(self.camera_thread, self.serial_thread)
+
+    def stop(self):
+        if self.macro_thread is not None:
+            self.macro_thread.stop()
+        if self.serial_thread is not None:
+            self.stop_handle = self.serial_thread.emergency_stop()
+        self.finished.set()
+
+    def close(self):
+        if self.macro_thread is not None and self.macro_thread.is_alive():
+            self.macro_thread.stop()
+            self.macro_thread.join()
+        if self.recorder is not None:
+            self.recorder.stop()
+            self.recorder = None
+        if self.tracker is not None:
+            self.tracker.stop()
+            logging.info('Tracker: {}'.format(self.tracker.get_stats()))
+            self.tracker = None
+        if self.vision is not None:
+            self.vision.stop()
+            logging.info('Vision: {}'.format(self.vision.get_stats()))
+            self.vision = None
+        self.camera_disconnect()
+        if self.stop_handle is not None:
+            # 정지 프레임이 나간 뒤에 포트를 닫음
+            self.stop_handle.wait(1.0)
+            self.stop_handle = None
+        self.serial_disconnect()
+        if self.replay is not None:
+            self.replay[0].close()
+            self.replay = None
+        flush_values()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the robot without GUI')
+    parser.add_argument('--port', default=None, help='serial port (default: data/serial.json)')
+    parser.add_argument('--macro', default=None, help='macro name in data/macro.json')
+    parser.add_argument('--camera', action='store_true', help='start camera thread')
+    parser.add_argument('--vision', action='store_true', help='run vision worker processes on the camera frames')
+    parser.add_argument('--track', action='store_true', help='track one object in the camera frames')
+    parser.add_argument('--duration', type=float, default=None, help='stop after seconds')
+    parser.add_argument('--rpy-interval', type=float, default=1.0, help='RPY logging interval in seconds')
+    parser.add_argument('--replay', default=None, help='replay a recorded session instead of camera and serial')
+    parser.add_argument('--speed', type=float, default=1.0, help='replay speed (0: as fast as possible)')
+    parser.add_argument('--record', default=None, help='record frames, RPY and commands to this file')
+    parser.add_argument('--timing', default=None, help='export latency histograms to this JSON file on exit')
+    parser.add_argument('--log-level', default='INFO')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=args.log_level.upper(), format=logging_format)
+
+    runtime = HeadlessRuntime()
+    signal.signal(signal.SIGINT, lambda *_: runtime.stop())
+    signal.signal(signal.SIGTERM, lambda *_: runtime.stop())
+
+    if args.replay:
+        runtime.replay_open(args.replay, args.speed)
+
+    runtime.serial_connect(args.port or load_value('serial', 'port', 'Test'))
+    if not runtime.connected.wait(load_value('serial', 'timeout', 5)):
+        logging.error('Serial is not connected')
+        runtime.close()
+        return 1
+
+    if args.camera:
+        runtime.camera_connect()
+        if args.vision:
+            try:
+                runtime.vision_start()
+            except RuntimeError as e:
+                logging.error(e)
+                runtime.close()
+                return 1
+        if args.track:
+            runtime.tracker_start()
+
+    if args.record:
+        runtime.record_start(args.record)
+
+    if args.macro is not None and not runtime.macro_start(args.macro):
+        runtime.close()
+        return 1
+
+    deadline = time.monotonic() + args.duration if args.duration is not None else None
+    while not runtime.finished.wait(args.rpy_interval):
+        if deadline is not None and time.monotonic() >= deadline:
+            break
+        if runtime.serial_thread is not None:
+            logging.info('RPY: {}'.format(runtime.serial_thread.get_rpy()))
+        if runtime.tracker is not None and runtime.tracker.latest is not None:
+            track = runtime.tracker.latest
+            logging.info('Track: center ({:.1f}, {:.1f}), velocity ({:.1f}, {:.1f}), misses {}'.format(
+                track.center[0], track.center[1], track.velocity[0], track.velocity[1], track.misses))
+        if runtime.vision is not None and runtime.vision.latest is not None:
+            logging.info('Vision: frame {}, centroids {}'.format(
+                runtime.vision.latest.frame_id, runtime.vision.latest.centroids.round(1).tolist()))
+
+    runtime.close()
+    if args.timing:
+        probes.export(args.timing)
+    logging.info('Timing: {}'.format(probes.status_text()))
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -2,20 +2,31 @@
 # -*- coding: utf-8 -*-
 
 import logging
+import logging.handlers
+import os
+import queue
 import sys
+import time
+from collections import deque
 
-import cv2
-from PyQt5 import uic
-from PyQt5.QtCore import QTimer, QPoint, QRect, pyqtSignal
-from PyQt5.QtGui import QImage, QPainter
-from PyQt5.QtWidgets import QApplication, QMainWindow, QAction, QWidget
+from utils import startup
 
-import widget
-from threads import CameraThread, SerialThread
-from utils import get_serial_port_list, save_value, load_value, resize_image
+with startup.phase('import PyQt5'):
+    from PyQt5.QtCore import QTimer, QPoint, QRect, pyqtSignal
+    from PyQt5.QtGui import QImage, QPainter
+    from PyQt5.QtWidgets import QApplication, QMainWindow, QAction, QWidget, QLabel, QFileDialog
+
+with startup.phase('import modules'):
+    import widget
+    from game import MotionLibrary
+    from threads import CameraGroup, SerialThread, SessionRecorder, LATEST, load_camera_configs
+    from utils import get_serial_port_list, SerialPortWatcher, save_value, load_value, flush_values, FrameResizer
+    from utils.probe import probes
+    from utils.ui_loader import load_ui_type
 
 mainFormClassFile = 'design/mainwindow.ui'
-main_form_class = uic.loadUiType(mainFormClassFile)[0]
+with startup.phase('load ui'):
+    main_form_class = load_ui_type(mainFormClassFile)[0]
 
 logging_config = {
     'console': {
@@ -24,7 +35,17 @@ logging_config = {
     },
     'widget': {
         'format': '[%(asctime)-15s] %(message)s',
-        'level': logging.INFO
+        'level': logging.INFO,
+        'interval': 200,  # ms
+        'max_pending': 5000,
+        'max_blocks': 2000
+    },
+    'file': {
+        'filename': 'logs/fira.log',
+        'format': '[%(asctime)-15s][%(levelname)s] %(threadName)s %(message)s',
+        'level': logging.DEBUG,
+        'max_bytes': 5 * 1024 * 1024,
+        'backup_count': 5
     }
 }
 
@@ -45,10 +66,12 @@ class ImageWidget(QWidget):
         :param image: QImage 객체
         :return: None
         """
-        self.image = image
-        sz = image.size()
-        self.setMinimumSize(sz)
-        self.update()
+        if image is not self.image:
+            self.image = image
+            sz = image.size()
+            if self.minimumSize() != sz:
+                self.setMinimumSize(sz)
+        self.update(0, 0, image.width(), image.height())
 
     def mouse_press(self, point):
         self.pressed = True
@@ -75,24 +98,36 @@ class ImageWidget(QWidget):
 
 
 class DisplayWindowClass(QMainWindow, main_form_class):
+    cameras = None
     camera_thread = None
     serial_thread = None
+    recorder = None
+
+    # display
+    display_resizer = None
+    display_buffer = None
+    display_image = None
+    display_subscription = None
+
+    # latency
+    timing_interval = 10  # update_window 10번(1초)마다 상태 표시줄 갱신
+    timing_ticks = 0
 
     serial_port = load_value('serial', 'port', 'Test')
     serial_port_action_list = []
 
-    logger = pyqtSignal(str)
     camera_connected = pyqtSignal()
     camera_disconnected = pyqtSignal()
     serial_connected = pyqtSignal()
     serial_disconnected = pyqtSignal()
+    serial_ports_changed = pyqtSignal(list)
+    macro_finished = pyqtSignal()
 
     def __init__(self, parent=None):
         super(DisplayWindowClass, self).__init__(parent)
         self.setupUi(self)
 
         # logging
-        self.logger.connect(self.append_log)
         log_text_edit = QPlainTextEditLogger(self)
         log_text_edit.setFormatter(logging.Formatter(logging_config['widget']['format']))
         log_text_edit.setLevel(logging_config['widget']['level'])
@@ -104,6 +139,8 @@ class DisplayWindowClass(QMainWindow, main_form_class):
         self.setup_shortcut()
 
         self.cameraWidget = ImageWidget(self.cameraWidget)
+        self.timingLabel = QLabel(self)
+        self.statusBar.addPermanentWidget(self.timingLabel)
         self.rpyLabel.setText('RPY: Disconnected')
 
         # signal and slot
@@ -111,6 +148,7 @@ class DisplayWindowClass(QMainWindow, main_form_class):
         self.serial_disconnected.connect(self.update_window_serial_disconnected)
         self.camera_connected.connect(self.update_window_camera_connected)
         self.camera_disconnected.connect(self.update_window_camera_disconnected)
+        self.macro_finished.connect(self.update_window_macro_finished)
 
         # update widget every 100ms
         self.timer = QTimer(self)
@@ -118,6 +156,7 @@ class DisplayWindowClass(QMainWindow, main_form_class):
         self.timer.start(100)  # 100ms
 
         # macro
+        self.motions = MotionLibrary(widget.KinematicWidget.max_row, widget.KinematicWidget.max_col)
         self.macro = widget.MacroWidget(self)
         self.kinematic = widget.KinematicWidget(self)
 
@@ -129,9 +168,27 @@ class DisplayWindowClass(QMainWindow, main_form_class):
 
         self.actionSerialConnect.triggered.connect(self.serial_connect)
         self.actionSerialDisconnect.triggered.connect(self.serial_disconnect)
+        self.actionEmergencyStop.triggered.connect(self.emergency_stop)
+
+        self.actionRecordSession.toggled.connect(self.record_session)
+        self.actionExportTiming.triggered.connect(self.export_timing)
 
     def setup_serial_menu(self):
-        port_list = get_serial_port_list()
+        self.update_serial_menu(get_serial_port_list())
+        self.menuSerialPort.triggered[QAction].connect(self.select_serial_port)
+
+        # USB 어댑터 연결/해제 시 메뉴 갱신
+        self.serial_ports_changed.connect(self.update_serial_menu)
+        self.serial_port_watcher = SerialPortWatcher(self.serial_ports_changed.emit)
+        self.serial_port_watcher.start()
+
+    def update_serial_menu(self, port_list):
+        # clear() 는 메뉴에서 빼기만 하므로 parent 가 self 인 이전 QAction 은 직접 삭제
+        for action in self.serial_port_action_list:
+            action.deleteLater()
+        self.menuSerialPort.clear()
+        self.serial_port_action_list = []
+
         if len(port_list):
             for port in port_list:
                 action = QAction(port, self)
@@ -158,8 +215,6 @@ class DisplayWindowClass(QMainWindow, main_form_class):
         if self.serial_port == 'Test':
             action.setChecked(True)
 
-        self.menuSerialPort.triggered[QAction].connect(self.select_serial_port)
-
     def setup_shortcut(self):
         # game start & stop menu action
         # self.actionGameStart.shortcut = QShortcut(QKeySequence(Qt.Key_4, Qt.Key_5, Qt.Key_6), self)
@@ -190,6 +245,8 @@ class DisplayWindowClass(QMainWindow, main_form_class):
             baudrate=load_value('serial', 'baudrate', 9600),
             timeout=load_value('serial', 'timeout', 5),
             delay=load_value('serial', 'delay', 1),
+            filter_tau=load_value('serial', 'filter_tau', None),
+            stop_frame=load_value('serial', 'stop_frame', None),
         )
 
     def serial_disconnect(self):
@@ -199,65 +256,109 @@ class DisplayWindowClass(QMainWindow, main_form_class):
             self.serial_thread.join()
             self.serial_thread = None
 
+    def emergency_stop(self):
+        # 매크로를 멈추고 대기 중인 동작 프레임을 버림, serial.stop_frame 이 설정되어 있으면 정지 프레임을 먼저 전송
+        if self.macro.thread is not None and self.macro.thread.is_alive():
+            self.macro.stop()
+        if self.serial_thread is not None:
+            self.serial_thread.emergency_stop()
+        self.statusBar.showMessage('Emergency Stop')
+
     def camera_connect(self):
         self.statusBar.showMessage('Camera connecting...')
-        self.camera_thread = CameraThread(
-            self,
-            name='CameraThread',
-            width=load_value('camera', 'width', 800),
-            height=load_value('camera', 'height', 600),
-            fps=load_value('camera', 'fps', 15),
-            delay=load_value('camera', 'delay', 0.05)
-        )
+        self.display_resizer = FrameResizer(load_value('camera', 'width', 300), load_value('camera', 'height', 240))
+        self.cameras = CameraGroup(self, load_camera_configs(), do_start=False)
+
+        # 화면에는 한 카메라의 최신 프레임만 표시
+        display = load_value('camera', 'display', self.cameras.primary)
+        if self.cameras.get(display) is None:
+            display = self.cameras.primary
+        self.camera_thread = self.cameras.get(display)
+        self.display_subscription = self.cameras.subscribe(display, LATEST)
+        self.cameras.start()
 
     def camera_disconnect(self):
         self.statusBar.showMessage('Camera disconnecting...')
-        if self.camera_thread is not None:
-            self.camera_thread.do_stop()
-            self.camera_thread.join()
+        if self.cameras is not None:
+            self.cameras.stop()
+            self.cameras = None
             self.camera_thread = None
+            self.display_subscription = None
 
     def update_window(self):
-        if self.camera_thread:
-            img = self.camera_thread.get_image()
-            if img is not None:
-                width = load_value('camera', 'width', 300)
-                height = load_value('camera', 'height', 240)
-                main_img = resize_image(img, width, height)
-                main_img = cv2.cvtColor(main_img, cv2.COLOR_BGR2RGB)
-
-                height, width, bpc = main_img.shape
-                bpl = bpc * width
-                main_image = QImage(main_img.data, width, height, bpl, QImage.Format_RGB888)
-                self.cameraWidget.set_image(main_image)
+        if self.display_subscription is not None:
+            frame = self.display_subscription.get(timeout=0)
+            if frame is not None:
+                with probes.measure('display.convert'):
+                    main_img = self.display_resizer.convert(frame.image)
+
+                # 출력 버퍼가 바뀔 때만 QImage 를 새로 만들고, 이후에는 같은 버퍼를 감싼 QImage 를 재사용
+                if main_img is not self.display_buffer:
+                    height, width, bpc = main_img.shape
+                    bpl = bpc * width
+                    self.display_buffer = main_img
+                    self.display_image = QImage(main_img.data, width, height, bpl, QImage.Format_RGB888)
+                self.cameraWidget.set_image(self.display_image)
 
         if self.serial_thread:
             rpy = self.serial_thread.get_rpy()
             self.rpyLabel.setText('RPY: ({}, {}, {})'.format(rpy[0], rpy[1], rpy[2]))
 
+        self.timing_ticks += 1
+        if self.timing_ticks >= self.timing_interval:
+            self.timing_ticks = 0
+            self.timingLabel.setText(probes.status_text())
+
+    def record_session(self, checked):
+        if checked:
+            directory = load_value('recorder', 'directory', 'recordings')
+            os.makedirs(directory, exist_ok=True)
+            filename = os.path.join(directory, time.strftime('session-%Y%m%d-%H%M%S.rec'))
+
+            self.recorder = SessionRecorder(filename, jpeg_quality=load_value('recorder', 'jpeg_quality', 90))
+            self.recorder.start()
+            self.recorder.attach(self.camera_thread, self.serial_thread)
+            self.statusBar.showMessage('Recording: {}'.format(filename))
+        elif self.recorder is not None:
+            self.recorder.stop()
+            self.statusBar.showMessage('Recording saved: {}'.format(self.recorder.filename))
+            self.recorder = None
+
+    def export_timing(self):
+        filename, _ = QFileDialog.getSaveFileName(self, 'Export Timing', 'timing.json', 'JSON (*.json)')
+        if filename:
+            probes.export(filename)
+            self.statusBar.showMessage('Timing exported: {}'.format(filename))
+
     def update_window_serial_connected(self):
         self.actionSerialConnect.setEnabled(False)
         self.actionSerialDisconnect.setEnabled(True)
+        self.actionEmergencyStop.setEnabled(True)
         self.macroStartButton.setEnabled(True)
         self.macroStopButton.setEnabled(False)
 
         # kinematic
         self.kinematicOptionSend.setEnabled(True)
         self.kinematicOptionLoadAndSend.setEnabled(True)
+        self.kinematicOptionLiveHead.setEnabled(True)
         self.kinematicSendButton.setEnabled(True)
 
         self.rpyLabel.setText('RPY: Connected')
+        if self.recorder is not None:
+            self.recorder.attach(serial_thread=self.serial_thread)
         self.statusBar.showMessage('Serial Connected')
 
     def update_window_serial_disconnected(self):
         self.actionSerialConnect.setEnabled(True)
         self.actionSerialDisconnect.setEnabled(False)
+        self.actionEmergencyStop.setEnabled(False)
         self.macroStartButton.setEnabled(False)
         self.macroStopButton.setEnabled(False)
 
         # kinematic
         self.kinematicOptionSend.setEnabled(False)
         self.kinematicOptionLoadAndSend.setEnabled(False)
+        self.kinematicOptionLiveHead.setEnabled(False)
         self.kinematicSendButton.setEnabled(False)
 
         self.rpyLabel.setText('RPY: Disconnected')
@@ -267,40 +368,131 @@ class DisplayWindowClass(QMainWindow, main_form_class):
         self.actionCameraConnect.setEnabled(False)
         self.actionCameraDisconnect.setEnabled(True)
         self.statusBar.showMessage('Camera Connected')
+        if self.recorder is not None:
+            self.recorder.attach(camera_thread=self.camera_thread)
 
     def update_window_camera_disconnected(self):
         self.actionCameraConnect.setEnabled(True)
         self.actionCameraDisconnect.setEnabled(False)
         self.statusBar.showMessage('Camera Disconnected')
 
+    def update_window_macro_finished(self):
+        self.macro.update_widget(False)
+
     def append_log(self, msg):
         self.logPlainTextEdit.appendPlainText(msg)
 
     def closeEvent(self, event):
+        self.serial_port_watcher.stop()
+        if self.recorder is not None:
+            self.actionRecordSession.setChecked(False)
         self.camera_disconnect()
         self.serial_disconnect()
+        self.motions.close()
+        flush_values()
 
 
 class QPlainTextEditLogger(logging.Handler):
-    def __init__(self, parent):
+    """
+    로그 위젯 출력용 핸들러
+    - emit() 은 큐에 넣기만 하고, GUI 스레드의 타이머가 모아서 한 번에 출력
+    - 같은 메시지가 연속되면 한 줄로 줄이고 반복 횟수만 출력
+    - 위젯의 줄 수와 대기 중인 메시지 수는 제한
+    """
+
+    def __init__(self, parent, interval=logging_config['widget']['interval'],
+                 max_pending=logging_config['widget']['max_pending'],
+                 max_blocks=logging_config['widget']['max_blocks']):
         super().__init__()
+        self.parent = parent
         self.widget = parent.logPlainTextEdit
         self.widget.setReadOnly(True)
-        self.logger = parent.logger
+        self.widget.setMaximumBlockCount(max_blocks)
+
+        self.pending = deque(maxlen=max_pending)
+        self.received = 0
+        self.shown = 0
+        self.last_key = None
+        self.repeat = 0
+
+        self.timer = QTimer(parent)
+        self.timer.timeout.connect(self.drain)
+        self.timer.start(interval)
 
     def emit(self, record):
-        msg = self.format(record)
-        self.logger.emit(msg)
+        try:
+            self.pending.append(((record.levelno, record.getMessage()), self.format(record)))
+            self.received += 1
+        except Exception:
+            self.handleError(record)
+
+    def drain(self):
+        if not self.pending and not self.repeat:
+            return
+
+        lines = []
+        dropped = self.received - self.shown - len(self.pending)
+        if dropped > 0:
+            lines.append('... {} log messages dropped'.format(dropped))
+            self.shown += dropped
+
+        while self.pending:
+            key, msg = self.pending.popleft()
+            self.shown += 1
+            if key == self.last_key:
+                self.repeat += 1
+                continue
+
+            if self.repeat:
+                lines.append('    (x {})'.format(self.repeat))
+            self.last_key, self.repeat = key, 0
+            lines.append(msg)
+
+        if self.repeat:
+            lines.append('    (x {})'.format(self.repeat))
+            self.repeat = 0
+
+        if lines:
+            self.parent.append_log('\n'.join(lines))
 
     def write(self, msg):
         pass
 
 
+def setup_file_logging():
+    """
+    전체 로그를 회전 파일로 기록
+    파일 기록은 QueueListener 스레드에서 하므로 로그를 남기는 스레드를 막지 않음
+    """
+    config = logging_config['file']
+    os.makedirs(os.path.dirname(config['filename']), exist_ok=True)
+
+    file_handler = logging.handlers.RotatingFileHandler(
+        config['filename'], maxBytes=config['max_bytes'], backupCount=config['backup_count'])
+    file_handler.setFormatter(logging.Formatter(config['format']))
+
+    log_queue = queue.Queue(-1)
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.setLevel(config['level'])
+    logging.getLogger().addHandler(queue_handler)
+
+    listener = logging.handlers.QueueListener(log_queue, file_handler)
+    listener.start()
+    return listener
+
+
 if __name__ == '__main__':
     # logging config
     logging.basicConfig(level=logging_config['console']['level'], format=logging_config['console']['format'])
-
-    app = QApplication(sys.argv)
-    display = DisplayWindowClass()
-    display.show()
-    sys.exit(app.exec_())
+    log_listener = setup_file_logging()
+
+    with startup.phase('create application'):
+        app = QApplication(sys.argv)
+    with startup.phase('create window'):
+        display = DisplayWindowClass()
+    with startup.phase('show window'):
+        display.show()
+    QTimer.singleShot(0, startup.report)
+    exit_code = app.exec_()
+    log_listener.stop()
+    sys.exit(exit_code)
@@ -1,2 +1,11 @@
 from .camera_thread import CameraThread
+from .camera_group import CameraGroup, load_camera_configs
+from .frame_buffer import Frame, FrameBuffer
+from .frame_bus import FrameBus, Subscription, LATEST, QUEUE
 from .serial_thread import SerialThread
+from .serial_writer import SendHandle, SerialWriter, PRIORITY_EMERGENCY, PRIORITY_HEAD, PRIORITY_MOTION
+from .protocol import MotionFrameError, build_motion, encode_motion, decode_motion
+from .rpy_history import RpyHistory
+from .sources import SyntheticCamera, open_camera
+from .recorder import SessionRecorder, SessionLog
+from .tracker_thread import TrackerThread
@@ -0,0 +1,96 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+import logging
+from collections import OrderedDict
+
+from threads.camera_thread import CameraThread
+from threads.frame_bus import FrameBus, LATEST
+from utils.file_control import load_value
+
+# 카메라별 설정이 없을 때 사용할 값
+CAMERA_DEFAULTS = OrderedDict([
+    ('source', 0),
+    ('width', 800),
+    ('height', 600),
+    ('fps', 15),
+    ('delay', 0.05),
+    ('mode', 'grab'),
+    ('buffer_size', 4),
+])
+
+
+def load_camera_configs(namespace='camera'):
+    """
+    data/camera.json 의 카메라 설정
+    - 최상위 값은 모든 카메라의 기본값
+    - cameras 에 카메라 이름별로 덮어쓸 값을 적음, enabled 가 false 인 카메라는 제외
+    - cameras 가 없으면 최상위 값으로 'head' 카메라 하나만 사용 (이전 설정 파일 호환)
+    :return: OrderedDict(카메라 이름 -> CameraThread 인자)
+    """
+    defaults = OrderedDict((key, load_value(namespace, key, value)) for key, value in CAMERA_DEFAULTS.items())
+    cameras = load_value(namespace, 'cameras', OrderedDict([('head', {})]))
+
+    configs = OrderedDict()
+    for name, overrides in cameras.items():
+        if not overrides.get('enabled', True):
+            continue
+        config = OrderedDict(defaults)
+        config.update((key, value) for key, value in overrides.items() if key in CAMERA_DEFAULTS)
+        configs[name] = config
+    return configs
+
+
+class CameraGroup:
+    """
+    여러 카메라 스레드를 하나의 FrameBus 로 묶음
+    사용 예)
+        cameras = CameraGroup(parent, load_camera_configs())
+        display = cameras.subscribe(cameras.primary, LATEST)
+    :param configs: 카메라 이름 -> CameraThread 인자, 첫 번째 카메라가 primary
+    :param sources: 카메라 이름 -> source 를 대신할 객체 (예: threads.replay.ReplayCamera)
+    """
+
+    def __init__(self, parent, configs, bus=None, sources=None, do_start=True):
+        self.bus = bus if bus is not None else FrameBus()
+        self.threads = OrderedDict()
+
+        for name, config in configs.items():
+            config = dict(config)
+            if sources and name in sources:
+                config['source'] = sources[name]
+            self.threads[name] = CameraThread(parent, name='Camera-{}'.format(name), bus=self.bus, camera=name,
+                                              do_start=False, **config)
+            logging.debug('Camera "{}": {}'.format(name, config))
+
+        if do_start:
+            self.start()
+
+    @property
+    def primary(self):
+        """첫 번째 카메라 이름"""
+        return next(iter(self.threads), None)
+
+    def names(self):
+        return list(self.threads.keys())
+
+    def get(self, name=None):
+        """:return: CameraThread, name 이 없으면 primary"""
+        return self.threads.get(name if name is not None else self.primary)
+
+    def subscribe(self, name=None, policy=LATEST, maxsize=2):
+        return self.bus.subscribe(name if name is not None else self.primary, policy, maxsize)
+
+    def start(self):
+        for thread in self.threads.values():
+            thread.start()
+
+    def stop(self):
+        for thread in self.threads.values():
+            thread.do_stop()
+        for thread in self.threads.values():
+            if thread.is_alive():
+                thread.join()
+
+    def get_stats(self):
+        return OrderedDict((name, thread.get_stats()) for name, thread in self.threads.items())
@@ -5,21 +5,46 @@ import logging
 import threading
 import time
 
-import cv2
+from threads.frame_buffer import FrameBuffer
+from threads.frame_bus import FrameBus, LATEST
+from threads.sources import open_camera
+from utils.probe import probes
+
+STATS_INTERVAL = 5.0
 
 
 class CameraThread(threading.Thread):
+    """
+    카메라 캡처 스레드
+    mode:
+        - grab: grab() 으로 드라이버 버퍼를 계속 비우고, 전달할 프레임만 retrieve() 로 디코딩(Default)
+                전달 주기는 monotonic 시계 기준 deadline 으로 맞춤
+        - read: read() 후 delay 만큼 sleep (이전 방식)
+    source: 카메라 장치 번호, 동영상 파일 경로, 'synthetic' (threads.sources.open_camera 참고)
+    bus: 프레임을 발행할 threads.frame_bus.FrameBus, 없으면 이 카메라만 쓰는 bus 를 만듦
+    camera: bus 에서 사용할 카메라 이름, 없으면 스레드 이름
+    """
     parent = None
-    image = None
     camera = None
     __do_stop = False
 
-    def __init__(self, parent, name, width=800, height=600, fps=15, delay=0.05, do_start=True):
+    def __init__(self, parent, name, width=800, height=600, fps=15, delay=0.05, mode='grab', buffer_size=4,
+                 source=0, bus=None, camera=None, do_start=True):
         threading.Thread.__init__(self)
 
         self.parent = parent
         self.name = name
         self.width, self.height, self.fps, self.delay = width, height, fps, delay
+        self.mode = mode
+        self.source = source
+        self.frames = FrameBuffer(buffer_size)
+        self.camera_name = camera or name
+        self.bus = bus if bus is not None else FrameBus()
+        self.bus.add_source(self.camera_name, self.frames)
+
+        # 측정값
+        self.capture_fps = 0.0
+        self._last_publish = None
 
         if do_start:
             self.start()
@@ -27,23 +52,100 @@ class CameraThread(threading.Thread):
     def run(self):
         logging.debug('Start')
 
-        self.camera = cv2.VideoCapture(0)
-        self.camera.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
-        self.camera.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
-        self.camera.set(cv2.CAP_PROP_FPS, self.fps)
+        self.camera = open_camera(self.source, self.width, self.height, self.fps)
         self.parent.camera_connected.emit()
 
-        while not self.__do_stop:
-            grabbed, self.image = self.camera.read()
-            time.sleep(self.delay)
+        if self.mode == 'grab':
+            self.run_grab()
+        else:
+            self.run_read()
 
         self.camera.release()
-        self.image = None
+        self.frames.close()
+        self.bus.remove_source(self.camera_name)
         logging.debug('Exit')
         self.parent.camera_disconnected.emit()
 
+    def run_read(self):
+        while not self.__do_stop:
+            # 미리 할당된 슬롯에 바로 읽어서 프레임마다 배열을 새로 만들지 않음
+            with probes.measure('camera.read'):
+                grabbed, image = self.camera.read(self.frames.write_slot())
+            if grabbed:
+                self.publish(image, time.monotonic())
+            time.sleep(self.delay)
+
+    def run_grab(self):
+        period = 1.0 / self.fps if self.fps else 0.0
+        deadline = time.monotonic()
+        next_report = deadline + STATS_INTERVAL
+
+        while not self.__do_stop:
+            # grab() 은 다음 프레임이 준비될 때까지 블록되므로 드라이버 버퍼에 오래된 프레임이 쌓이지 않음
+            if not self.camera.grab():
+                time.sleep(self.delay)
+                continue
+
+            # 카메라 주기가 설정 fps 와 같으면 deadline 직전에 도착하는 프레임이 많으므로 반 주기까지는 허용
+            captured = time.monotonic()
+            if captured < deadline - period / 2:
+                continue
+
+            with probes.measure('camera.read'):
+                grabbed, image = self.camera.retrieve(self.frames.write_slot())
+            if grabbed:
+                self.publish(image, captured)
+
+            # 밀린 만큼 몰아서 전달하지 않고 다음 주기로 넘어감
+            deadline += period
+            if deadline < captured:
+                deadline = captured + period
+
+            if captured >= next_report:
+                next_report = captured + STATS_INTERVAL
+                logging.debug('Capture fps: {:.1f}, frame age: {:.1f}ms, dropped: {}'.format(
+                    self.capture_fps, self.frame_age * 1000, self.dropped_frames))
+
+    def publish(self, image, timestamp):
+        self.frames.publish(image, timestamp)
+        self.bus.publish(self.camera_name, self.frames.peek())
+
+        if self._last_publish is not None and timestamp > self._last_publish:
+            fps = 1.0 / (timestamp - self._last_publish)
+            self.capture_fps = fps if self.capture_fps == 0 else self.capture_fps * 0.9 + fps * 0.1
+        self._last_publish = timestamp
+
     def do_stop(self):
         self.__do_stop = True
 
     def get_image(self):
-        return self.image
+        frame = self.frames.get_latest()
+        return frame.image if frame is not None and not self.__do_stop else None
+
+    def get_latest(self):
+        return self.frames.get_latest()
+
+    def wait_for_frame(self, after_id=0, timeout=None):
+        return self.frames.wait_for_frame(after_id, timeout)
+
+    def subscribe(self, policy=LATEST, maxsize=2):
+        """:return: 이 카메라의 threads.frame_bus.Subscription"""
+        return self.bus.subscribe(self.camera_name, policy, maxsize)
+
+    @property
+    def dropped_frames(self):
+        return self.frames.dropped
+
+    @property
+    def frame_age(self):
+        """가장 최근 프레임이 캡처된 후 지난 시간(초)"""
+        if self._last_publish is None:
+            return 0.0
+        return time.monotonic() - self._last_publish
+
+    def get_stats(self):
+        return {
+            'fps': self.capture_fps,
+            'frame_age': self.frame_age,
+            'dropped': self.dropped_frames,
+        }
@@ -0,0 +1,129 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+import threading
+import time
+from collections import namedtuple
+
+import numpy as np
+
+Frame = namedtuple('Frame', ['frame_id', 'timestamp', 'image'])
+
+
+class FrameBuffer:
+    """
+    미리 할당된 슬롯을 돌려쓰는 프레임 링 버퍼
+    - 각 슬롯은 프레임 id 와 monotonic 캡처 시각을 가짐
+    - 소비자는 wait_for_frame() 으로 새 프레임이 들어올 때까지 대기
+    - 반환된 image 는 링이 한 바퀴 돌 때까지(size - 1 프레임)만 유효하므로 오래 보관하려면 복사해서 사용
+    """
+
+    def __init__(self, size=4):
+        self.size = size
+        self.dropped = 0
+
+        self._slots = [None] * size
+        self._ids = [0] * size
+        self._timestamps = [0.0] * size
+        self._consumed = [True] * size
+        self._frame_id = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+    @property
+    def frame_id(self):
+        return self._frame_id
+
+    def write_slot(self):
+        """
+        다음 프레임을 기록할 슬롯
+        :return: 미리 할당된 배열, 아직 할당되지 않았으면 None
+        """
+        return self._slots[(self._frame_id + 1) % self.size]
+
+    def publish(self, image, timestamp=None):
+        """
+        새 프레임 등록
+        :param image: write_slot() 에 직접 기록한 배열 또는 복사할 이미지
+        :param timestamp: 캡처 시각(time.monotonic 기준), 없으면 현재 시각
+        :return: 등록된 프레임 id
+        """
+        if timestamp is None:
+            timestamp = time.monotonic()
+
+        with self._cond:
+            frame_id = self._frame_id + 1
+            idx = frame_id % self.size
+
+            slot = self._slots[idx]
+            if image is not slot:
+                if slot is None or slot.shape != image.shape or slot.dtype != image.dtype:
+                    slot = self._slots[idx] = np.empty_like(image)
+                np.copyto(slot, image)
+
+            if not self._consumed[idx]:
+                self.dropped += 1
+
+            self._ids[idx] = frame_id
+            self._timestamps[idx] = timestamp
+            self._consumed[idx] = False
+            self._frame_id = frame_id
+            self._cond.notify_all()
+
+        return frame_id
+
+    def _frame(self, frame_id):
+        idx = frame_id % self.size
+        self._consumed[idx] = True
+        return Frame(self._ids[idx], self._timestamps[idx], self._slots[idx])
+
+    def get_latest(self):
+        """
+        가장 최근 프레임
+        :return: Frame, 프레임이 없으면 None
+        """
+        with self._cond:
+            if self._frame_id == 0:
+                return None
+            return self._frame(self._frame_id)
+
+    def peek(self):
+        """
+        가장 최근 프레임 (소비한 것으로 표시하지 않음)
+        :return: Frame, 프레임이 없으면 None
+        """
+        frame_id = self._frame_id
+        if frame_id == 0:
+            return None
+        idx = frame_id % self.size
+        return Frame(self._ids[idx], self._timestamps[idx], self._slots[idx])
+
+    def is_valid(self, frame_id):
+        """frame_id 의 슬롯이 아직 덮어쓰이지 않았으면 True"""
+        return 0 < frame_id and self._frame_id - frame_id < self.size - 1
+
+    def consume(self, frame_id):
+        """구독으로 전달된 프레임을 소비한 것으로 표시"""
+        if self.is_valid(frame_id):
+            self._consumed[frame_id % self.size] = True
+
+    def wait_for_frame(self, after_id=0, timeout=None):
+        """
+        after_id 보다 새로운 프레임이 들어올 때까지 대기
+        놓친 프레임 수는 (반환된 frame_id - after_id - 1)
+        :param after_id: 마지막으로 처리한 프레임 id
+        :param timeout: 최대 대기 시간(초), None 이면 무한 대기
+        :return: 가장 최근 Frame, 시간 초과 또는 종료 시 None
+        """
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._closed or self._frame_id > after_id, timeout):
+                return None
+            if self._frame_id <= after_id:
+                return None
+            return self._frame(self._frame_id)
+
+    def close(self):
+        """대기 중인 소비자를 모두 깨움"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
@@ -0,0 +1,124 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+import threading
+from collections import deque
+
+# 전달 방식
+LATEST = 'latest'  # 가장 최근 프레임 하나만 보관, 처리하지 못한 프레임은 새 프레임으로 대체
+QUEUE = 'queue'  # maxsize 개까지 순서대로 보관, 가득 차면 가장 오래된 프레임을 버림
+
+
+class Subscription:
+    """
+    한 카메라의 프레임을 받는 구독
+    - 프레임은 복사하지 않고 카메라 FrameBuffer 슬롯을 그대로 전달
+    - 카메라는 이 구독을 기다리지 않으므로, 느린 소비자는 프레임을 놓칠 뿐 캡처를 늦추지 않음
+    - 링 버퍼가 한 바퀴 돌아 이미 덮어쓴 프레임은 get() 에서 건너뜀
+    """
+
+    def __init__(self, bus, camera, buffer, policy=LATEST, maxsize=2):
+        if policy not in (LATEST, QUEUE):
+            raise ValueError('Unknown delivery policy: {}'.format(policy))
+
+        self.bus = bus
+        self.camera = camera
+        self.buffer = buffer
+        self.policy = policy
+        self.dropped = 0
+        self.received = 0
+
+        self._frames = deque(maxlen=1 if policy == LATEST else maxsize)
+        self._cond = threading.Condition()
+        self._closed = False
+
+    @property
+    def closed(self):
+        return self._closed
+
+    def put(self, frame):
+        with self._cond:
+            if len(self._frames) == self._frames.maxlen:
+                self.dropped += 1
+            self._frames.append(frame)
+            self._cond.notify()
+
+    def get(self, timeout=None):
+        """
+        다음 프레임
+        :param timeout: 최대 대기 시간(초), 0 이면 기다리지 않음, None 이면 무한 대기
+        :return: threads.frame_buffer.Frame, 시간 초과 또는 종료 시 None
+        """
+        with self._cond:
+            while True:
+                if not self._cond.wait_for(lambda: self._closed or self._frames, timeout):
+                    return None
+                if not self._frames:
+                    return None
+
+                frame = self._frames.popleft()
+                if self.buffer is None:
+                    self.received += 1
+                    return frame
+                if self.buffer.is_valid(frame.frame_id):
+                    self.buffer.consume(frame.frame_id)
+                    self.received += 1
+                    return frame
+                self.dropped += 1
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def unsubscribe(self):
+        self.bus.unsubscribe(self)
+        self.close()
+
+
+class FrameBus:
+    """
+    카메라별 프레임 발행/구독
+    사용 예)
+        sub = bus.subscribe('head', QUEUE, maxsize=3)
+        frame = sub.get(timeout=0.1)
+    """
+
+    def __init__(self):
+        self._buffers = {}
+        self._subscriptions = {}
+        self._lock = threading.Lock()
+
+    def cameras(self):
+        return list(self._buffers.keys())
+
+    def add_source(self, camera, buffer=None):
+        """:param buffer: 카메라의 FrameBuffer, 구독에서 덮어쓴 프레임을 거르는 데 사용"""
+        with self._lock:
+            self._buffers[camera] = buffer
+            for subscription in self._subscriptions.get(camera, ()):
+                subscription.buffer = buffer
+
+    def remove_source(self, camera):
+        """카메라가 멈추면 구독을 모두 닫아 대기 중인 소비자를 깨움"""
+        with self._lock:
+            self._buffers.pop(camera, None)
+            subscriptions = self._subscriptions.pop(camera, ())
+        for subscription in subscriptions:
+            subscription.close()
+
+    def subscribe(self, camera, policy=LATEST, maxsize=2):
+        with self._lock:
+            subscription = Subscription(self, camera, self._buffers.get(camera), policy, maxsize)
+            self._subscriptions[camera] = self._subscriptions.get(camera, ()) + (subscription,)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.camera, ())
+            self._subscriptions[subscription.camera] = tuple(s for s in subscriptions if s is not subscription)
+
+    def publish(self, camera, frame):
+        # 구독 목록은 바뀔 때마다 새 tuple 로 교체하므로 잠금 없이 순회
+        for subscription in self._subscriptions.get(camera, ()):
+            subscription.put(frame)
@@ -0,0 +1,93 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+import struct
+
+# 동작 프레임(17 bytes) 필드 위치
+HEADER = 0
+SELECT_MODE = 1
+STRIDE_LEFT_LEG = 2
+STRIDE_RIGHT_LEG = 3
+SPEED = 4
+SWING_LEFT_LEG = 5
+SWING_RIGHT_LEG = 6
+UP_LEFT_LEG = 7
+UP_RIGHT_LEG = 8
+TURN_LEFT_ANGLE = 9
+TURN_RIGHT_ANGLE = 10
+OFFSET_LEFT_LEG = 11
+OFFSET_RIGHT_LEG = 12
+HEAD_LEFT_RIGHT = 13
+HEAD_UP_DOWN = 14
+END_DATA1 = 15
+END_DATA2 = 16
+
+MOTION_HEADER = 0xFF
+MOTION_FOOTER = 0xFE
+MOTION_FRAME_LENGTH = 17
+
+# KinematicWidget.fields 순서와 같은 데이터 필드
+MOTION_FIELDS = (
+    SELECT_MODE,
+    STRIDE_LEFT_LEG, STRIDE_RIGHT_LEG,
+    SPEED,
+    SWING_LEFT_LEG, SWING_RIGHT_LEG,
+    UP_LEFT_LEG, UP_RIGHT_LEG,
+    TURN_LEFT_ANGLE, TURN_RIGHT_ANGLE,
+    OFFSET_LEFT_LEG, OFFSET_RIGHT_LEG,
+    HEAD_LEFT_RIGHT, HEAD_UP_DOWN,
+)
+
+# RPY 텔레메트리(0xFF, yaw, pitch, roll, 0xFE)
+RPY_HEADER = 0xFF
+RPY_FOOTER = 0xFE
+RPY_FRAME_LENGTH = 5
+
+_motion_struct = struct.Struct('{}B'.format(MOTION_FRAME_LENGTH))
+
+
+class MotionFrameError(ValueError):
+    pass
+
+
+def build_motion(values):
+    """
+    데이터 필드 값으로 동작 프레임 목록 생성
+    :param values: MOTION_FIELDS 순서의 값
+    :return: 17개 int 목록
+    """
+    data = [0] * MOTION_FRAME_LENGTH
+    data[HEADER] = MOTION_HEADER
+    for field, value in zip(MOTION_FIELDS, values):
+        data[field] = value
+    data[END_DATA1] = MOTION_FOOTER
+    data[END_DATA2] = MOTION_FOOTER
+    return data
+
+
+def encode_motion(data):
+    """
+    동작 프레임 검증 후 전송용 bytes 로 변환
+    :param data: 17개 int 목록
+    :return: bytes
+    """
+    if isinstance(data, bytes) and len(data) == MOTION_FRAME_LENGTH:
+        return data
+
+    if len(data) != MOTION_FRAME_LENGTH:
+        raise MotionFrameError('Motion frame must be {} bytes: {}'.format(MOTION_FRAME_LENGTH, data))
+    if data[HEADER] != MOTION_HEADER or data[END_DATA1] != MOTION_FOOTER or data[END_DATA2] != MOTION_FOOTER:
+        raise MotionFrameError('Invalid motion frame header/footer: {}'.format(data))
+
+    try:
+        return _motion_struct.pack(*data)
+    except struct.error:
+        raise MotionFrameError('Motion frame values must be in 0..255: {}'.format(data))
+
+
+def decode_motion(frame):
+    """
+    :param frame: 전송용 bytes
+    :return: 17개 int 목록
+    """
+    return list(_motion_struct.unpack(frame))
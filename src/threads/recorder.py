@@ -0,0 +1,228 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+import logging
+import mmap
+import queue
+import struct
+import threading
+from collections import namedtuple
+
+import numpy as np
+
+from threads.frame_bus import QUEUE
+from utils.startup import lazy_import
+
+cv2 = lazy_import('cv2')
+
+# 파일 구조: MAGIC 다음에 레코드가 이어짐
+# 레코드: RECORD_HEADER (type, payload 길이, monotonic 시각, id) + payload
+MAGIC = b'FIRAREC1'
+RECORD_HEADER = struct.Struct('<B3xIdQ')
+FRAME_HEADER = struct.Struct('<HHB')
+RPY_PAYLOAD = struct.Struct('<3d')
+
+FRAME_RAW = 1
+FRAME_JPEG = 2
+RPY = 3
+COMMAND = 4
+
+Record = namedtuple('Record', ['type', 'timestamp', 'id', 'offset', 'length'])
+
+
+class SessionRecorder(threading.Thread):
+    """
+    카메라 프레임, RPY, 전송한 명령을 monotonic 시각과 함께 파일에 기록
+    - 파일 기록(과 JPEG 압축)은 이 스레드에서만 하고, 큐가 가득 차면 버리므로 캡처를 막지 않음
+    - attach() 하면 별도의 tap 스레드가 카메라 새 프레임과 RpyHistory 의 새 샘플을 가져옴
+    - 기록 중에 다시 연결한 카메라/시리얼 스레드도 attach() 로 추가
+    :param jpeg_quality: None 이면 raw 로 저장
+    """
+
+    def __init__(self, filename, jpeg_quality=None, maxsize=64):
+        threading.Thread.__init__(self, name='SessionRecorder', daemon=True)
+
+        self.filename = filename
+        self.jpeg_quality = jpeg_quality
+        self.queue = queue.Queue(maxsize)
+        self.dropped = 0
+        self.written = 0
+
+        self._do_stop = threading.Event()
+        self._taps = []
+        self._serials = []
+        self._attached = []
+
+    def put(self, item):
+        try:
+            self.queue.put_nowait(item)
+        except queue.Full:
+            self.dropped += 1
+
+    def record_frame(self, frame_id, timestamp, image):
+        # 카메라 슬롯은 다시 쓰이므로 복사해서 보관
+        self.put((FRAME_RAW, timestamp, frame_id, image.copy()))
+
+    def record_rpy(self, timestamp, rpy):
+        self.put((RPY, timestamp, 0, RPY_PAYLOAD.pack(*rpy)))
+
+    def record_command(self, timestamp, data):
+        self.put((COMMAND, timestamp, 0, bytes(data)))
+
+    def on_sent(self, handle):
+        self.record_command(handle.sent_at, handle.data)
+
+    def attach(self, camera_thread=None, serial_thread=None):
+        """
+        기록할 카메라/시리얼 스레드를 추가
+        - 다시 연결된 스레드마다 호출할 수 있고, 이미 추가한 스레드는 무시
+        - 추가한 스레드가 멈추면 그 tap 스레드는 종료
+        """
+        if camera_thread in self._attached:
+            camera_thread = None
+        if serial_thread in self._attached:
+            serial_thread = None
+        if camera_thread is None and serial_thread is None:
+            return
+
+        if serial_thread is not None:
+            self._serials.append(serial_thread)
+            serial_thread.writer.sent.connect(self.on_sent)
+        self._attached.extend(thread for thread in (camera_thread, serial_thread) if thread is not None)
+
+        tap = threading.Thread(target=self._run_tap, args=(camera_thread, serial_thread),
+                               name='SessionRecorderTap', daemon=True)
+        self._taps.append(tap)
+        tap.start()
+
+    def _run_tap(self, camera_thread, serial_thread):
+        # 모든 프레임을 순서대로 받되, 밀리면 캡처를 기다리지 않고 버림
+        subscription = camera_thread.subscribe(QUEUE) if camera_thread is not None else None
+        rpy_count = serial_thread.history.count if serial_thread is not None else 0
+
+        while not self._do_stop.is_set() and (subscription is not None or serial_thread is not None):
+            if subscription is not None:
+                frame = subscription.get(timeout=0.05)
+                if frame is not None:
+                    self.record_frame(frame.frame_id, frame.timestamp, frame.image)
+                elif subscription.closed:
+                    # 카메라가 멈추면 get() 이 바로 반환하므로 구독을 정리하고 더 기다리지 않음
+                    self.dropped += subscription.dropped
+                    subscription.unsubscribe()
+                    subscription = None
+            else:
+                self._do_stop.wait(0.05)
+
+            if serial_thread is not None:
+                alive = serial_thread.is_alive()
+                history = serial_thread.history
+                count = history.count
+                if count > rpy_count:
+                    for sample in history.last(count - rpy_count):
+                        self.record_rpy(sample[0], sample[1:])
+                    rpy_count = count
+                if not alive:
+                    serial_thread = None
+
+        if subscription is not None:
+            self.dropped += subscription.dropped
+            subscription.unsubscribe()
+
+    def encode(self, kind, payload):
+        if kind != FRAME_RAW:
+            return kind, payload
+
+        height, width, channels = payload.shape
+        if self.jpeg_quality is not None:
+            ok, encoded = cv2.imencode('.jpg', payload, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+            if ok:
+                return FRAME_JPEG, encoded.tobytes()
+        return FRAME_RAW, FRAME_HEADER.pack(height, width, channels) + payload.tobytes()
+
+    def run(self):
+        logging.info('Recording: {}'.format(self.filename))
+        with open(self.filename, 'wb') as f:
+            f.write(MAGIC)
+            while True:
+                try:
+                    item = self.queue.get(timeout=0.1)
+                except queue.Empty:
+                    if self._do_stop.is_set():
+                        break
+                    continue
+
+                kind, timestamp, record_id, payload = item
+                kind, payload = self.encode(kind, payload)
+                f.write(RECORD_HEADER.pack(kind, len(payload), timestamp, record_id))
+                f.write(payload)
+                self.written += 1
+
+        logging.info('Recording finished: {} records, {} dropped'.format(self.written, self.dropped))
+
+    def stop(self):
+        self._do_stop.set()
+        for serial_thread in self._serials:
+            serial_thread.writer.sent.disconnect(self.on_sent)
+        for tap in self._taps:
+            tap.join()
+        if self.is_alive():
+            self.join()
+
+
+class SessionLog:
+    """
+    기록된 세션 파일을 mmap 으로 읽음
+    - 열 때 레코드 헤더만 훑어서 색인을 만들고, payload 는 필요할 때만 읽음
+    - raw 프레임은 복사 없이 mmap 위의 배열 view 로 반환하므로 close() 전에 view 를 모두 놓아야 함
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self._file = open(filename, 'rb')
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self._mmap[:len(MAGIC)] != MAGIC:
+            self.close()
+            raise ValueError('Not a session recording: {}'.format(filename))
+
+        self.records = []
+        offset = len(MAGIC)
+        size = len(self._mmap)
+        while offset + RECORD_HEADER.size <= size:
+            kind, length, timestamp, record_id = RECORD_HEADER.unpack_from(self._mmap, offset)
+            offset += RECORD_HEADER.size
+            if offset + length > size:
+                # 기록 중에 끊긴 마지막 레코드
+                break
+            self.records.append(Record(kind, timestamp, record_id, offset, length))
+            offset += length
+
+        self.frames = [r for r in self.records if r.type in (FRAME_RAW, FRAME_JPEG)]
+        self.commands = [r for r in self.records if r.type == COMMAND]
+
+        rpy = [r for r in self.records if r.type == RPY]
+        self.rpy = np.zeros((len(rpy), 4), dtype=np.float64)
+        for idx, r in enumerate(rpy):
+            self.rpy[idx, 0] = r.timestamp
+            self.rpy[idx, 1:] = RPY_PAYLOAD.unpack_from(self._mmap, r.offset)
+
+    def payload(self, record):
+        return self._mmap[record.offset:record.offset + record.length]
+
+    def frame(self, record):
+        """
+        :param record: self.frames 의 항목
+        :return: BGR 이미지 (raw 는 mmap view, jpeg 는 디코딩한 배열)
+        """
+        if record.type == FRAME_RAW:
+            height, width, channels = FRAME_HEADER.unpack_from(self._mmap, record.offset)
+            return np.frombuffer(self._mmap, dtype=np.uint8, count=height * width * channels,
+                                 offset=record.offset + FRAME_HEADER.size).reshape(height, width, channels)
+        return cv2.imdecode(np.frombuffer(self.payload(record), dtype=np.uint8), cv2.IMREAD_COLOR)
+
+    def command(self, record):
+        return self.payload(record)
+
+    def close(self):
+        self._mmap.close()
+        self._file.close()
@@ -0,0 +1,210 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+import bisect
+import threading
+import time
+
+import numpy as np
+
+from threads.protocol import RPY_HEADER, RPY_FOOTER, RPY_FRAME_LENGTH
+from threads.recorder import SessionLog
+
+
+class ReplayClock:
+    """
+    기록 시각 기준의 재생 시계
+    - speed > 0: 실제 시간의 speed 배로 진행
+    - speed == 0: 최대한 빠르게 진행, 재생 소스가 advance() 로 시계를 앞당김
+    """
+
+    def __init__(self, start, speed=1.0):
+        self.start = start
+        self.speed = speed
+        self._now = start
+        self._origin = None
+        self._lock = threading.Lock()
+
+    @property
+    def asap(self):
+        return not self.speed
+
+    def now(self):
+        if self.asap:
+            return self._now
+
+        with self._lock:
+            if self._origin is None:
+                self._origin = time.monotonic()
+        return self.start + (time.monotonic() - self._origin) * self.speed
+
+    def advance(self, timestamp):
+        with self._lock:
+            if timestamp > self._now:
+                self._now = timestamp
+
+    def sleep_until(self, timestamp, timeout=None):
+        """
+        기록 시각 timestamp 까지 대기
+        :return: timestamp 에 도달했으면 True
+        """
+        if self.asap:
+            return self._now >= timestamp
+
+        wait = (timestamp - self.now()) / self.speed
+        if timeout is not None and wait > timeout:
+            time.sleep(timeout)
+            return False
+        if wait > 0:
+            time.sleep(wait)
+        return True
+
+
+class ReplayCamera:
+    """
+    기록된 프레임을 재생하는 cv2.VideoCapture 대체 (CameraThread 의 source 로 사용)
+    - grab() 은 재생 시각까지 지난 프레임을 디코딩 없이 건너뛰고, retrieve() 에서 전달할 프레임만 디코딩
+    - 최대한 빠르게 재생할 때는 건너뛰지 않고 모든 프레임을 순서대로 전달
+    """
+
+    def __init__(self, log, clock):
+        self.log = log
+        self.clock = clock
+        self.index = -1
+        self.skipped = 0
+
+        self._timestamps = [record.timestamp for record in log.frames]
+
+    @property
+    def finished(self):
+        return self.index >= len(self._timestamps) - 1
+
+    def isOpened(self):
+        return True
+
+    def set(self, prop, value):
+        return False
+
+    def get(self, prop):
+        return 0
+
+    def grab(self):
+        if self.finished:
+            return False
+
+        if self.clock.asap:
+            self.index += 1
+            self.clock.advance(self._timestamps[self.index])
+            return True
+
+        self.clock.sleep_until(self._timestamps[self.index + 1])
+        index = bisect.bisect_right(self._timestamps, self.clock.now()) - 1
+        index = max(index, self.index + 1)
+        self.skipped += index - self.index - 1
+        self.index = index
+        return True
+
+    def retrieve(self, image=None):
+        if self.index < 0:
+            return False, None
+
+        frame = self.log.frame(self.log.frames[self.index])
+        if image is not None and image.shape == frame.shape:
+            np.copyto(image, frame)
+            return True, image
+        return True, frame
+
+    def read(self, image=None):
+        if not self.grab():
+            return False, None
+        return self.retrieve(image)
+
+    def release(self):
+        pass
+
+
+class ReplaySerial:
+    """
+    기록된 RPY 를 시리얼 바이트 스트림으로 재생하는 pyserial 대체 (SerialThread 의 port 로 사용)
+    - 재생 시각까지 지난 샘플을 RPY 프레임 바이트로 돌려줌
+    - write() 된 데이터는 written 에 (재생 시각, 데이터) 로 기록
+    :param camera: 같은 시계를 쓰는 ReplayCamera, 최대한 빠르게 재생할 때는 카메라가 없거나 끝난 뒤에만
+                   이 소스가 시계를 앞당김
+    """
+
+    def __init__(self, log, clock, timeout=0.1, camera=None):
+        self.log = log
+        self.clock = clock
+        self.timeout = timeout
+        self.camera = camera
+        self.written = []
+        self.position = 0
+
+        self._timestamps = log.rpy[:, 0]
+        stream = np.empty((len(log.rpy), RPY_FRAME_LENGTH), dtype=np.uint8)
+        stream[:, 0] = RPY_HEADER
+        stream[:, 1] = log.rpy[:, 3]
+        stream[:, 2] = log.rpy[:, 2]
+        stream[:, 3] = log.rpy[:, 1]
+        stream[:, 4] = RPY_FOOTER
+        self._stream = stream.tobytes()
+
+    @property
+    def finished(self):
+        return self.position >= len(self._timestamps)
+
+    def _due(self):
+        drive_clock = self.camera is None or self.camera.finished
+        if self.clock.asap and drive_clock and not self.finished:
+            self.clock.advance(self._timestamps[self.position])
+        return int(np.searchsorted(self._timestamps, self.clock.now(), side='right'))
+
+    @property
+    def in_waiting(self):
+        return (self._due() - self.position) * RPY_FRAME_LENGTH
+
+    def read(self, size=1):
+        due = self._due()
+        if due <= self.position:
+            if self.finished:
+                time.sleep(self.timeout)
+                return b''
+            self.clock.sleep_until(self._timestamps[self.position], self.timeout)
+            due = self._due()
+            if due <= self.position:
+                return b''
+
+        count = max(1, min(due - self.position, -(-size // RPY_FRAME_LENGTH)))
+        start = self.position * RPY_FRAME_LENGTH
+        self.position += count
+        return self._stream[start:start + count * RPY_FRAME_LENGTH]
+
+    def write(self, data):
+        self.written.append((self.clock.now(), bytes(data)))
+        return len(data)
+
+    def cancel_read(self):
+        pass
+
+    def isOpen(self):
+        return True
+
+    def close(self):
+        pass
+
+
+def open_replay(filename, speed=1.0):
+    """
+    기록된 세션을 재생할 카메라/시리얼 소스 생성
+    :param speed: 1.0 은 실제 속도, N 은 N 배속, 0 은 최대한 빠르게
+    :return: (SessionLog, ReplayCamera, ReplaySerial)
+    """
+    log = SessionLog(filename)
+    starts = []
+    if log.frames:
+        starts.append(log.frames[0].timestamp)
+    if len(log.rpy):
+        starts.append(log.rpy[0, 0])
+    clock = ReplayClock(min(starts) if starts else 0.0, speed)
+    camera = ReplayCamera(log, clock)
+    return log, camera, ReplaySerial(log, clock, camera=camera)
@@ -0,0 +1,107 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+import numpy as np
+
+TIME = 0
+ROLL = 1
+PITCH = 2
+YAW = 3
+
+
+class RpyHistory:
+    """
+    RPY 시계열 링 버퍼 (timestamp, roll, pitch, yaw)
+    - 배열을 두 배 길이로 할당하고 각 샘플을 두 곳에 기록하므로, 최근 capacity 개 이내의 구간은 항상 연속된 view 로 조회
+    - 기록은 SerialThread 하나만 하고, 읽는 쪽은 락이나 복사 없이 view 를 사용
+    - tau 를 지정하면 샘플마다 1차 저역 통과 필터를 갱신해서 filtered 배열에 기록
+    """
+
+    def __init__(self, capacity=1024, tau=None):
+        self.capacity = capacity
+        self.tau = tau
+        self.count = 0
+
+        self.raw = np.zeros((capacity * 2, 4), dtype=np.float64)
+        self.filtered = np.zeros((capacity * 2, 4), dtype=np.float64)
+
+    def append(self, timestamp, roll, pitch, yaw):
+        idx = self.count % self.capacity
+        sample = (timestamp, roll, pitch, yaw)
+
+        if self.tau and self.count:
+            prev = self.filtered[idx - 1 + self.capacity]
+            dt = timestamp - prev[TIME]
+            # 같은 시각의 샘플은 필터 값을 바꾸지 않음
+            alpha = dt / (self.tau + dt) if dt > 0 else 0.0
+            filtered = (timestamp,
+                        prev[ROLL] + alpha * (roll - prev[ROLL]),
+                        prev[PITCH] + alpha * (pitch - prev[PITCH]),
+                        prev[YAW] + alpha * (yaw - prev[YAW]))
+        else:
+            filtered = sample
+
+        self.raw[idx] = self.raw[idx + self.capacity] = sample
+        self.filtered[idx] = self.filtered[idx + self.capacity] = filtered
+        self.count += 1
+
+    def latest(self, filtered=False):
+        """
+        :return: 최근 샘플 (timestamp, roll, pitch, yaw), 없으면 None
+        """
+        if not self.count:
+            return None
+        data = self.filtered if filtered else self.raw
+        return data[(self.count - 1) % self.capacity + self.capacity]
+
+    def last(self, n, filtered=False):
+        """
+        :return: 최근 n 개 샘플의 view (n x 4)
+        """
+        count = self.count
+        n = min(n, count, self.capacity)
+        end = (count - 1) % self.capacity + self.capacity + 1
+        data = self.filtered if filtered else self.raw
+        return data[end - n:end]
+
+    def window(self, duration, now=None, filtered=False):
+        """
+        :param duration: 조회 구간(초)
+        :param now: 구간의 끝 시각, 없으면 최근 샘플 시각
+        :return: 구간 안 샘플의 view (n x 4)
+        """
+        samples = self.last(self.capacity, filtered)
+        if not len(samples):
+            return samples
+
+        if now is None:
+            now = samples[-1, TIME]
+        start = np.searchsorted(samples[:, TIME], now - duration, side='left')
+        end = np.searchsorted(samples[:, TIME], now, side='right')
+        return samples[start:end]
+
+    def mean(self, duration, now=None, filtered=False):
+        samples = self.window(duration, now, filtered)
+        return samples[:, ROLL:].mean(axis=0) if len(samples) else None
+
+    def min(self, duration, now=None, filtered=False):
+        samples = self.window(duration, now, filtered)
+        return samples[:, ROLL:].min(axis=0) if len(samples) else None
+
+    def max(self, duration, now=None, filtered=False):
+        samples = self.window(duration, now, filtered)
+        return samples[:, ROLL:].max(axis=0) if len(samples) else None
+
+    def rate(self, duration, now=None, filtered=False):
+        """
+        구간 안 (roll, pitch, yaw) 의 초당 변화량 (최소제곱 기울기)
+        """
+        samples = self.window(duration, now, filtered)
+        if len(samples) < 2:
+            return None
+
+        t = samples[:, TIME] - samples[:, TIME].mean()
+        denom = np.dot(t, t)
+        if denom == 0:
+            return None
+        return np.dot(t, samples[:, ROLL:] - samples[:, ROLL:].mean(axis=0)) / denom
@@ -8,23 +8,56 @@ import time
 
 import serial
 
-HEADER = 0
-SELECT_MODE = 1
-STRIDE_LEFT_LEG = 2
-STRIDE_RIGHT_LEG = 3
-SPEED = 4
-SWING_LEFT_LEG = 5
-SWING_RIGHT_LEG = 6
-UP_LEFT_LEG = 7
-UP_RIGHT_LEG = 8
-TURN_LEFT_ANGLE = 9
-TURN_RIGHT_ANGLE = 10
-OFFSET_LEFT_LEG = 11
-OFFSET_RIGHT_LEG = 12
-HEAD_LEFT_RIGHT = 13
-HEAD_UP_DOWN = 14
-END_DATA1 = 15
-END_DATA2 = 16
+from threads.protocol import RPY_HEADER, RPY_FOOTER, RPY_FRAME_LENGTH, encode_motion
+from threads.rpy_history import RpyHistory
+from threads.serial_writer import SerialWriter, PRIORITY_EMERGENCY, PRIORITY_HEAD, PRIORITY_MOTION
+from utils.probe import probes
+
+
+class RpyParser:
+    """
+    RPY 텔레메트리(0xFF, yaw, pitch, roll, 0xFE) 스트림 파서
+    - 읽은 바이트를 버퍼에 이어 붙이고 완성된 프레임을 모두 꺼냄
+    - header/footer 가 맞지 않으면 다음 header 를 찾아 다시 동기화
+    """
+
+    def __init__(self):
+        self.buffer = bytearray()
+        self.frames = 0
+        self.corrupt = 0
+        self._synced = True
+
+    def feed(self, data):
+        """
+        :param data: 새로 읽은 bytes
+        :return: 완성된 (roll, pitch, yaw) 목록
+        """
+        buf = self.buffer
+        buf.extend(data)
+
+        result = []
+        pos = 0
+        end = len(buf) - RPY_FRAME_LENGTH
+        while pos <= end:
+            if buf[pos] == RPY_HEADER and buf[pos + RPY_FRAME_LENGTH - 1] == RPY_FOOTER:
+                result.append((buf[pos + 3], buf[pos + 2], buf[pos + 1]))
+                pos += RPY_FRAME_LENGTH
+                self._synced = True
+                continue
+
+            # 한 번 어긋날 때마다 하나의 손상된 프레임으로 집계
+            if self._synced:
+                self._synced = False
+                self.corrupt += 1
+                logging.error('Get unexpected values from serial: {}'.format(bytes(buf[pos:pos + RPY_FRAME_LENGTH])))
+
+            pos = buf.find(RPY_HEADER, pos + 1)
+            if pos < 0:
+                pos = len(buf)
+
+        del buf[:pos]
+        self.frames += len(result)
+        return result
 
 
 class SerialThread(threading.Thread):
@@ -32,13 +65,19 @@ class SerialThread(threading.Thread):
     _do_stop = False
     _rpy = (0, 0, 0)
 
-    def __init__(self, parent, name, port='test', baudrate=9600, timeout=None, delay=1, do_start=True):
+    def __init__(self, parent, name, port='test', baudrate=9600, timeout=None, delay=1, history_size=1024,
+                 filter_tau=None, stop_frame=None, do_start=True):
         threading.Thread.__init__(self)
 
         self.parent = parent
         self.name = name
         self.port, self.baudrate, self.timeout = port, baudrate, timeout
         self.delay = delay
+        self.parser = RpyParser()
+        self.history = RpyHistory(history_size, filter_tau)
+        # 펌웨어에서 확인한 정지 프레임(17개 int), 없으면 비상 정지 때 큐만 비움
+        self.stop_frame = stop_frame
+        self.writer = SerialWriter(name='{}Writer'.format(name))
 
         if do_start:
             self.start()
@@ -47,48 +86,107 @@ class SerialThread(threading.Thread):
         logging.debug('Start')
 
         try:
-            self.serial = serial.Serial(
-                port=self.port,
-                baudrate=self.baudrate,
-                timeout=self.timeout
-            ) if self.port.lower() != 'test' else None
+            if not isinstance(self.port, str):
+                # pyserial 과 같은 인터페이스의 객체 (예: threads.replay.ReplaySerial)
+                self.serial = self.port
+            elif self.port.lower() != 'test':
+                self.serial = serial.Serial(
+                    port=self.port,
+                    baudrate=self.baudrate,
+                    timeout=self.timeout
+                )
+            else:
+                self.serial = None
             self.parent.serial_connected.emit()
         except serial.serialutil.SerialException:
             logging.error('SerialException: {}'.format(sys.exc_info()[1]))
+            self.writer.stop('failed')
             return
         except:
             logging.error('Unexpected error: {}'.format(sys.exc_info()[0]))
+            self.writer.stop('failed')
             return
 
-        while not self._do_stop:
-            data = self.serial.read(5) if self.serial is not None else (255, 1, 2, 3, 254)
+        self.writer.port = self.serial
+        self.writer.start()
 
-            if data is not None and len(data) == 5 and int(data[0]) == 255 and int(data[4]) == 254:
-                self._rpy = (int(data[3]), int(data[2]), int(data[1]))
-            elif data is not None:
-                logging.error('Get unexpected values from serial: {}, len: {}'.format(data, len(data)))
+        while not self._do_stop:
+            if self.serial is not None:
+                # 최소 1 바이트를 기다린 뒤 들어와 있는 바이트를 모두 읽음
+                data = self.serial.read(self.serial.in_waiting or 1)
             else:
+                data = bytes((255, 1, 2, 3, 254))
+                time.sleep(self.delay)
+
+            if not data:
                 logging.debug('Timeout read from serial...')
+                continue
 
-            time.sleep(self.delay)
+            with probes.measure('serial.parse'):
+                frames = self.parser.feed(data)
+            if frames:
+                for timestamp, rpy in zip(self.frame_times(len(frames)), frames):
+                    self.history.append(timestamp, *rpy)
+                self._rpy = frames[-1]
 
+        self.writer.stop()
+        self.writer.join()
         if self.serial is not None and self.serial.isOpen():
             self.serial.close()
         self.serial = None
         logging.debug('Exit')
         self.parent.serial_disconnected.emit()
 
+    def frame_times(self, count):
+        """
+        한 번에 읽은 count 개 프레임의 수신 시각
+        마지막 프레임을 현재 시각으로 보고, 앞의 프레임은 전송 시간(10 bit/byte) 간격으로 앞당김
+        """
+        now = time.monotonic()
+        interval = RPY_FRAME_LENGTH * 10.0 / self.baudrate if self.baudrate else 0.0
+        last = self.history.latest()
+        if last is not None and now - (count - 1) * interval <= last[0]:
+            # 이전 샘플보다 앞서지 않도록 그 사이를 균등하게 나눔
+            interval = (now - last[0]) / count
+        return [now - (count - 1 - idx) * interval for idx in range(count)]
+
     def do_stop(self):
         self._do_stop = True
 
     def get_rpy(self):
         return self._rpy
 
-    def send_data(self, data):
-        logging.debug('Send data: {}'.format(data))
-        if self.serial is not None:
-            self.serial.cancel_read()
-            self.serial.write(data)
-            logging.debug('Send data succeed')
-        elif self.port == 'Test':
-            logging.debug('[Test] Send data succeed')
+    @property
+    def corrupt_frames(self):
+        return self.parser.corrupt
+
+    def send_data(self, data, priority=PRIORITY_MOTION, kind=None):
+        """
+        전송 큐에 프레임을 넣고 바로 반환
+        :param data: 전송할 데이터
+        :param priority: PRIORITY_EMERGENCY, PRIORITY_HEAD, PRIORITY_MOTION
+        :param kind: 같은 kind 의 대기 중인 프레임은 새 프레임으로 대체(예: 'head')
+        :return: SendHandle, 포트가 열리지 않았거나 이미 닫혔으면 state 가 failed
+        """
+        return self.writer.put(data, priority, kind)
+
+    def send_head(self, frame):
+        """
+        머리 각도를 바꾼 동작 프레임을 대기 중인 동작 프레임보다 먼저 전송
+        아직 나가지 않은 이전 머리 프레임은 대체
+        :param frame: 전송용 bytes (Send 버튼으로 보내는 것과 같은 동작 프레임)
+        :return: SendHandle
+        """
+        return self.send_data(frame, PRIORITY_HEAD, 'head')
+
+    def emergency_stop(self):
+        """
+        대기 중인 머리/동작 프레임을 버리고, 정지 프레임이 설정되어 있으면 가장 먼저 전송
+        :return: 정지 프레임의 SendHandle, 설정되지 않았으면 None
+        """
+        dropped = self.writer.drop(PRIORITY_HEAD)
+        logging.warning('Emergency stop, {} queued frames dropped'.format(dropped))
+        if self.stop_frame is None:
+            logging.warning('Stop frame is not configured (serial.stop_frame), nothing sent')
+            return None
+        return self.send_data(encode_motion(self.stop_frame), PRIORITY_EMERGENCY, 'stop')
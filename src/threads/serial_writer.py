@@ -0,0 +1,204 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+import heapq
+import itertools
+import logging
+import threading
+import time
+
+from utils.events import Signal
+from utils.probe import probes
+
+# 숫자가 작을수록 먼저 전송
+PRIORITY_EMERGENCY = 0
+PRIORITY_HEAD = 1
+PRIORITY_MOTION = 2
+
+QUEUE_SIZE = 32
+
+
+class SendHandle:
+    """
+    send_data() 가 돌려주는 전송 상태
+    state:
+        - queued: 대기 중
+        - sent: 포트로 전송 완료
+        - superseded: 같은 종류의 새 프레임으로 대체됨
+        - dropped: 큐가 가득 차서 버려짐
+        - failed: 전송 중 오류, 또는 포트가 열리지 않았거나 이미 닫힘
+    """
+
+    def __init__(self, data, priority, kind):
+        self.data = data
+        self.priority = priority
+        self.kind = kind
+        self.state = 'queued'
+        self.queued_at = time.monotonic()
+        self.sent_at = None
+        self._done = threading.Event()
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    @property
+    def sent(self):
+        return self.state == 'sent'
+
+    @property
+    def latency(self):
+        """큐에 들어간 뒤 포트로 나갈 때까지 걸린 시간(초)"""
+        return self.sent_at - self.queued_at if self.sent_at is not None else None
+
+    def wait(self, timeout=None):
+        """
+        처리가 끝날 때까지 대기
+        :return: 포트로 전송되었으면 True
+        """
+        self._done.wait(timeout)
+        return self.sent
+
+    def finish(self, state):
+        self.state = state
+        if state == 'sent':
+            self.sent_at = time.monotonic()
+        self._done.set()
+
+
+class SerialWriter(threading.Thread):
+    """
+    우선순위 큐를 사용하는 시리얼 전송 스레드
+    - 비상 정지, 머리 추적 프레임은 대기 중인 동작 프레임보다 먼저 전송
+    - kind 가 같은 프레임이 아직 대기 중이면 새 프레임으로 대체
+    - 큐가 가득 차면 가장 우선순위가 낮은 프레임을 버림
+    - stop() 하면 대기 중인 비상 정지 프레임까지 전송한 뒤 종료, stop() 이후에 넣은 프레임은 바로 failed 로 처리
+    """
+
+    def __init__(self, port=None, name='SerialWriter', maxsize=QUEUE_SIZE):
+        threading.Thread.__init__(self, name=name, daemon=True)
+
+        self.port = port
+        self.maxsize = maxsize
+
+        # 포트로 전송된 SendHandle 을 전달
+        self.sent = Signal()
+
+        self._queue = []
+        self._pending = {}
+        self._counter = itertools.count()
+        self._cond = threading.Condition()
+        self._do_stop = False
+
+    def put(self, data, priority=PRIORITY_MOTION, kind=None):
+        handle = SendHandle(data, priority, kind)
+
+        with self._cond:
+            if self._do_stop:
+                logging.error('Serial writer is stopped, cannot send data: {}'.format(data))
+                handle.finish('failed')
+                return handle
+
+            if kind is not None and kind in self._pending:
+                entry = self._pending[kind]
+                entry[2].finish('superseded')
+                # 새 프레임이 더 급하면 큐 안의 위치도 앞당김
+                if priority < entry[0]:
+                    entry[0] = priority
+                    heapq.heapify(self._queue)
+                entry[2] = handle
+                self._pending[kind] = entry
+                return handle
+
+            if len(self._queue) >= self.maxsize:
+                worst = max(self._queue)
+                if worst[0] <= priority:
+                    logging.error('Serial send queue is full, drop data: {}'.format(data))
+                    handle.finish('dropped')
+                    return handle
+                self._remove(worst)
+                logging.error('Serial send queue is full, drop data: {}'.format(worst[2].data))
+                worst[2].finish('dropped')
+
+            entry = [priority, next(self._counter), handle]
+            heapq.heappush(self._queue, entry)
+            if kind is not None:
+                self._pending[kind] = entry
+            self._cond.notify()
+
+        return handle
+
+    def drop(self, priority):
+        """
+        대기 중인 프레임 중 priority 이상(덜 급한)인 것을 모두 버림
+        :return: 버린 프레임 수
+        """
+        with self._cond:
+            entries = [entry for entry in self._queue if entry[0] >= priority]
+            for entry in entries:
+                self._remove(entry)
+                entry[2].finish('dropped')
+        return len(entries)
+
+    def _remove(self, entry):
+        self._queue.remove(entry)
+        heapq.heapify(self._queue)
+        if entry[2].kind is not None and self._pending.get(entry[2].kind) is entry:
+            del self._pending[entry[2].kind]
+
+    def _get(self):
+        with self._cond:
+            while not self._queue and not self._do_stop:
+                self._cond.wait()
+            # 멈출 때도 비상 정지 프레임은 모두 전송하고, 나머지는 run() 에서 dropped 로 정리
+            if self._do_stop and (not self._queue or self._queue[0][0] > PRIORITY_EMERGENCY):
+                return None
+
+            entry = heapq.heappop(self._queue)
+            if entry[2].kind is not None and self._pending.get(entry[2].kind) is entry:
+                del self._pending[entry[2].kind]
+            return entry[2]
+
+    def run(self):
+        while True:
+            handle = self._get()
+            if handle is None:
+                break
+
+            logging.debug('Send data: {}'.format(handle.data))
+            if self.port is None:
+                logging.debug('[Test] Send data succeed')
+                handle.finish('sent')
+                probes.record('serial.send', handle.latency)
+                self.sent.emit(handle)
+                continue
+
+            try:
+                self.port.write(handle.data)
+                handle.finish('sent')
+                probes.record('serial.send', handle.latency)
+                self.sent.emit(handle)
+                logging.debug('Send data succeed')
+            except Exception:
+                logging.exception('Send data failed')
+                handle.finish('failed')
+
+        self._clear('dropped')
+
+    def _clear(self, state):
+        # 남은 프레임은 전송하지 않고 정리
+        with self._cond:
+            for entry in self._queue:
+                entry[2].finish(state)
+            self._queue = []
+            self._pending = {}
+
+    def stop(self, state=None):
+        """
+        :param state: 대기 중인 프레임을 바로 이 상태로 정리 (예: 포트를 열지 못해 run 이 시작되지 않은 경우 'failed')
+        """
+        with self._cond:
+            self._do_stop = True
+            self._cond.notify_all()
+        if state is not None:
+            self._clear(state)
@@ -0,0 +1,92 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+import time
+
+import numpy as np
+
+from utils.startup import lazy_import
+
+cv2 = lazy_import('cv2')
+
+
+class SyntheticCamera:
+    """
+    카메라 없이 프레임을 생성하는 cv2.VideoCapture 대체
+    - 배경 위에서 원이 움직이는 BGR 프레임을 만듦
+    - realtime 이면 fps 에 맞춰 grab() 이 블록되고, 아니면 최대한 빠르게 생성
+    """
+
+    def __init__(self, width=320, height=240, fps=15, realtime=True):
+        self.width, self.height, self.fps = width, height, fps
+        self.realtime = realtime
+        self.frame_count = 0
+
+        self._background = np.zeros((height, width, 3), dtype=np.uint8)
+        self._background[:, :, 0] = np.linspace(0, 255, width, dtype=np.uint8)
+        self._background[:, :, 1] = np.linspace(0, 255, height, dtype=np.uint8)[:, None]
+        self._frame = self._background.copy()
+        self._next = time.monotonic()
+
+    def isOpened(self):
+        return True
+
+    def set(self, prop, value):
+        if prop == cv2.CAP_PROP_FPS:
+            self.fps = value
+        return False
+
+    def get(self, prop):
+        return {
+            cv2.CAP_PROP_FRAME_WIDTH: self.width,
+            cv2.CAP_PROP_FRAME_HEIGHT: self.height,
+            cv2.CAP_PROP_FPS: self.fps,
+        }.get(prop, 0)
+
+    def grab(self):
+        if self.realtime and self.fps:
+            now = time.monotonic()
+            if now < self._next:
+                time.sleep(self._next - now)
+            self._next = max(self._next + 1.0 / self.fps, time.monotonic())
+        self.frame_count += 1
+        return True
+
+    def retrieve(self, image=None):
+        if image is None or image.shape != self._frame.shape:
+            image = np.empty_like(self._frame)
+
+        np.copyto(image, self._background)
+        t = self.frame_count / float(self.fps or 30)
+        center = (int(self.width / 2 + self.width / 3 * np.cos(t)), int(self.height / 2 + self.height / 3 * np.sin(t)))
+        cv2.circle(image, center, max(4, self.height // 12), (0, 128, 255), -1)
+        return True, image
+
+    def read(self, image=None):
+        self.grab()
+        return self.retrieve(image)
+
+    def release(self):
+        pass
+
+
+def open_camera(source=0, width=800, height=600, fps=15):
+    """
+    카메라 소스 열기
+    :param source:
+        - int: 카메라 장치 번호
+        - 'synthetic': 생성 프레임 (SyntheticCamera)
+        - 그 외 문자열: 동영상 파일 경로 또는 스트림 URL
+        - grab/retrieve 가 있는 객체: 그대로 사용
+    :return: cv2.VideoCapture 와 같은 인터페이스의 객체
+    """
+    if hasattr(source, 'grab'):
+        return source
+    if source == 'synthetic':
+        return SyntheticCamera(width, height, fps)
+
+    camera = cv2.VideoCapture(source)
+    camera.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+    camera.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+    camera.set(cv2.CAP_PROP_FPS, fps)
+    return camera
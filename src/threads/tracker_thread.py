@@ -0,0 +1,53 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+import logging
+import threading
+
+from threads.frame_bus import LATEST
+from utils.events import Signal
+from utils.probe import probes
+
+
+class TrackerThread(threading.Thread):
+    """
+    카메라의 최신 프레임으로 utils.tracker.RoiTracker 를 갱신하는 스레드
+    - 추적기는 프레임 순서에 따라 상태가 바뀌므로 작업 프로세스 풀 대신 스레드 하나에서 실행
+    - 처리가 밀리면 지난 프레임은 건너뛰고 가장 최근 프레임만 사용
+    - 갱신할 때마다 tracked 신호로 Track (또는 None) 을 전달
+    """
+
+    def __init__(self, camera_thread, tracker, name='TrackerThread', do_start=True):
+        threading.Thread.__init__(self, name=name, daemon=True)
+
+        self.tracker = tracker
+        self.subscription = camera_thread.subscribe(LATEST)
+        self.tracked = Signal()
+        self.latest = None
+
+        self._do_stop = threading.Event()
+
+        if do_start:
+            self.start()
+
+    def run(self):
+        logging.debug('Start')
+        while not self._do_stop.is_set() and not self.subscription.closed:
+            frame = self.subscription.get(timeout=0.1)
+            if frame is None:
+                continue
+
+            with probes.measure('vision.track'):
+                self.latest = self.tracker.update(frame.image, frame.timestamp)
+            self.tracked.emit(self.latest)
+
+        self.subscription.unsubscribe()
+        logging.debug('Exit')
+
+    def stop(self):
+        self._do_stop.set()
+        if self.is_alive():
+            self.join()
+
+    def get_stats(self):
+        return self.tracker.get_stats()
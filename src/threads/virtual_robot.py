@@ -0,0 +1,91 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+import math
+import os
+import select
+import threading
+import time
+import tty
+
+from threads.protocol import MOTION_HEADER, MOTION_FOOTER, MOTION_FRAME_LENGTH, RPY_HEADER, RPY_FOOTER
+
+
+class VirtualRobot(threading.Thread):
+    """
+    pty 로 만든 가상 시리얼 포트에 연결된 로봇 대체 (Linux/macOS)
+    - rate 주기로 사인파 형태의 RPY 프레임을 전송
+    - 받은 동작 프레임을 수신 시각(time.monotonic)과 함께 commands 에 기록
+    사용 예) SerialThread(parent, 'SerialThread', port=robot.port)
+    """
+
+    def __init__(self, rate=100, name='VirtualRobot'):
+        threading.Thread.__init__(self, name=name, daemon=True)
+        self.rate = rate
+
+        self.master, self.slave = os.openpty()
+        tty.setraw(self.master)
+        tty.setraw(self.slave)
+        self.port = os.ttyname(self.slave)
+
+        self.commands = []
+        self.sent_frames = 0
+        self._buffer = bytearray()
+        self._do_stop = False
+
+    @staticmethod
+    def rpy_frame(t):
+        roll = int(127 + 60 * math.sin(t))
+        pitch = int(127 + 30 * math.sin(t * 0.7))
+        yaw = int(127 + 100 * math.sin(t * 0.1))
+        return bytes((RPY_HEADER, yaw, pitch, roll, RPY_FOOTER))
+
+    def run(self):
+        start = time.monotonic()
+        period = 1.0 / self.rate if self.rate else None
+        next_send = start
+
+        while not self._do_stop:
+            timeout = max(0.0, next_send - time.monotonic()) if period else 0.1
+            readable, _, _ = select.select([self.master], [], [], timeout)
+            if readable:
+                try:
+                    data = os.read(self.master, 4096)
+                except OSError:
+                    break
+                self.receive(data, time.monotonic())
+
+            now = time.monotonic()
+            if period and now >= next_send:
+                try:
+                    os.write(self.master, self.rpy_frame(now - start))
+                except OSError:
+                    break
+                self.sent_frames += 1
+                next_send += period
+                if next_send < now:
+                    next_send = now + period
+
+    def receive(self, data, timestamp):
+        buf = self._buffer
+        buf.extend(data)
+
+        pos = 0
+        while len(buf) - pos >= MOTION_FRAME_LENGTH:
+            end = pos + MOTION_FRAME_LENGTH
+            if buf[pos] == MOTION_HEADER and buf[end - 2] == MOTION_FOOTER and buf[end - 1] == MOTION_FOOTER:
+                self.commands.append((timestamp, bytes(buf[pos:end])))
+                pos = end
+            else:
+                pos += 1
+        del buf[:pos]
+
+    def stop(self):
+        self._do_stop = True
+
+    def close(self):
+        self.stop()
+        if self.is_alive():
+            self.join()
+        os.close(self.master)
+        os.close(self.slave)
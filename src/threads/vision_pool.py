@@ -0,0 +1,230 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+import logging
+import multiprocessing
+import queue
+import sys
+import threading
+import time
+from collections import namedtuple
+
+try:
+    from multiprocessing import shared_memory
+except ImportError:
+    # Python 3.8 미만
+    shared_memory = None
+
+import numpy as np
+
+from threads.frame_bus import LATEST
+from utils.events import Signal
+from utils.pipeline import DEFAULT_PIPELINE, Pipeline
+from utils.probe import probes
+
+# boxes: (N, 4, 2) int32, draw_rectangle 에 바로 쓸 수 있는 4점 상자
+# centroids: (N, 2) float32
+VisionResult = namedtuple('VisionResult', ['frame_id', 'timestamp', 'boxes', 'centroids', 'elapsed'])
+
+
+class SharedFrameSlots:
+    """
+    multiprocessing.shared_memory 위의 프레임 슬롯 배열
+    - 만든 프로세스는 create=True, 작업 프로세스는 name 으로 같은 메모리를 연결
+    - slot(idx) 는 복사 없이 공유 메모리 위의 배열 view 를 반환
+    - unlink 는 만든 프로세스만 close() 에서 함
+    """
+
+    def __init__(self, shape, count, dtype=np.uint8, name=None, create=True):
+        self.shape = tuple(shape)
+        self.count = count
+        self.dtype = np.dtype(dtype)
+        self.create = create
+
+        size = int(np.prod(self.shape)) * self.dtype.itemsize * count
+        self.shm = shared_memory.SharedMemory(name=name, create=create, size=size if create else 0)
+        self.array = np.ndarray((count,) + self.shape, dtype=self.dtype, buffer=self.shm.buf)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def slot(self, idx):
+        return self.array[idx]
+
+    def close(self):
+        self.array = None
+        self.shm.close()
+        if self.create:
+            self.shm.unlink()
+
+
+def _run_worker(name, shape, count, dtype, tasks, results, target, options):
+    """작업 프로세스: 슬롯 번호를 받아 처리하고 결과만 돌려줌"""
+    slots = SharedFrameSlots(shape, count, dtype, name=name, create=False)
+    try:
+        while True:
+            task = tasks.get()
+            if task is None:
+                break
+
+            idx, frame_id, timestamp = task
+            start = time.perf_counter()
+            try:
+                boxes, centroids = target(slots.slot(idx), **options)
+            except Exception:
+                logging.exception('Vision worker failed on frame {}'.format(frame_id))
+                boxes, centroids = None, None
+            results.put((idx, frame_id, timestamp, boxes, centroids, time.perf_counter() - start))
+    finally:
+        slots.close()
+
+
+class VisionPool:
+    """
+    공유 메모리 슬롯을 사용하는 비전 작업 프로세스 풀 (Python 3.8 이상)
+    - submit() 은 프레임을 빈 슬롯에 복사하고 (슬롯 번호, frame id, 시각) 만 큐에 넣음, 픽셀은 pickle 하지 않음
+    - 빈 슬롯이 없으면 기다리지 않고 버림 (dropped)
+    - 결과는 수집 스레드가 받아서 latest 에 보관하고 results 신호로 VisionResult 를 전달
+    - 슬롯과 작업 프로세스는 첫 프레임의 크기로 만들어짐
+    :param target: 작업 프로세스에서 실행할 함수 target(image, **options) -> (boxes, centroids),
+                   pickle 할 수 있는 모듈 최상위 함수나 utils.pipeline.Pipeline, 없으면 기본 파이프라인
+    :param context: multiprocessing 시작 방식, Qt 스레드가 있는 프로세스에서 fork 하지 않도록 spawn 이 기본
+    """
+
+    def __init__(self, workers=None, slots=None, target=None, options=None, context='spawn'):
+        if shared_memory is None:
+            raise RuntimeError('Vision pool needs multiprocessing.shared_memory (Python 3.8 or later), '
+                               'running on Python {}.{}'.format(*sys.version_info[:2]))
+
+        self.workers = workers or max(1, multiprocessing.cpu_count() - 1)
+        self.slot_count = slots or self.workers * 2
+        self.target = target if target is not None else Pipeline.from_config(DEFAULT_PIPELINE)
+        self.options = options or {}
+        self.context = multiprocessing.get_context(context)
+
+        self.results = Signal()
+        self.latest = None
+        self.submitted = 0
+        self.completed = 0
+        self.dropped = 0
+
+        self._slots = None
+        self._free = []
+        self._processes = []
+        self._tasks = None
+        self._results = None
+        self._lock = threading.Lock()
+        self._collector = None
+        self._feeder = None
+        self._do_stop = threading.Event()
+
+    def _setup(self, image):
+        self._slots = SharedFrameSlots(image.shape, self.slot_count, image.dtype)
+        self._free = list(range(self.slot_count))
+        self._tasks = self.context.Queue()
+        self._results = self.context.Queue()
+
+        for idx in range(self.workers):
+            process = self.context.Process(
+                target=_run_worker, name='VisionWorker-{}'.format(idx), daemon=True,
+                args=(self._slots.name, image.shape, self.slot_count, image.dtype,
+                      self._tasks, self._results, self.target, self.options))
+            process.start()
+            self._processes.append(process)
+
+        self._collector = threading.Thread(target=self._collect, name='VisionCollector', daemon=True)
+        self._collector.start()
+        logging.info('Vision pool: {} workers, {} slots of {}'.format(self.workers, self.slot_count, image.shape))
+
+    def submit(self, frame):
+        """
+        :param frame: threads.frame_buffer.Frame
+        :return: 작업 프로세스로 보냈으면 True
+        """
+        if self._do_stop.is_set():
+            return False
+        if self._slots is None:
+            self._setup(frame.image)
+        elif frame.image.shape != self._slots.shape:
+            logging.error('Vision pool frame size changed: {}'.format(frame.image.shape))
+            self.dropped += 1
+            return False
+
+        with self._lock:
+            if not self._free:
+                self.dropped += 1
+                return False
+            idx = self._free.pop()
+
+        np.copyto(self._slots.slot(idx), frame.image)
+        self._tasks.put((idx, frame.frame_id, frame.timestamp))
+        self.submitted += 1
+        return True
+
+    def _collect(self):
+        while True:
+            try:
+                item = self._results.get(timeout=0.1)
+            except queue.Empty:
+                if self._do_stop.is_set():
+                    break
+                continue
+
+            idx, frame_id, timestamp, boxes, centroids, elapsed = item
+            with self._lock:
+                self._free.append(idx)
+            self.completed += 1
+            if boxes is None:
+                continue
+
+            probes.record('vision.process', elapsed)
+            probes.record('vision.latency', time.monotonic() - timestamp)
+            result = VisionResult(frame_id, timestamp, boxes, centroids, elapsed)
+            self.latest = result
+            self.results.emit(result)
+
+    def attach(self, camera_thread):
+        """카메라의 최신 프레임을 빈 슬롯이 생길 때마다 보냄"""
+        self._feeder = threading.Thread(target=self._run_feeder, args=(camera_thread.subscribe(LATEST),),
+                                        name='VisionFeeder', daemon=True)
+        self._feeder.start()
+
+    def _run_feeder(self, subscription):
+        while not self._do_stop.is_set() and not subscription.closed:
+            frame = subscription.get(timeout=0.1)
+            if frame is None:
+                continue
+            # 슬롯이 모두 사용 중이면 잠깐 기다렸다가 그 사이 들어온 최신 프레임을 보냄
+            while self._slots is not None and not self._free and not self._do_stop.is_set():
+                time.sleep(0.001)
+            frame = subscription.get(timeout=0) or frame
+            self.submit(frame)
+        subscription.unsubscribe()
+
+    def get_stats(self):
+        return {
+            'workers': self.workers,
+            'submitted': self.submitted,
+            'completed': self.completed,
+            'dropped': self.dropped,
+            'pending': self.submitted - self.completed,
+        }
+
+    def stop(self):
+        self._do_stop.set()
+        if self._feeder is not None:
+            self._feeder.join()
+        if self._slots is None:
+            return
+
+        for _ in self._processes:
+            self._tasks.put(None)
+        for process in self._processes:
+            process.join(1.0)
+            if process.is_alive():
+                process.terminate()
+        self._collector.join()
+        self._processes = []
+        self._slots.close()
+        self._slots = None
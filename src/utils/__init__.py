@@ -1,6 +1,9 @@
-from .file_control import save_value, load_value
-from .serial import get_serial_port_list
-from .image import resize_image
+from .file_control import save_value, load_value, flush as flush_values
+from .serial import get_serial_port_list, SerialPortWatcher
+from . import geometry
+from .image import resize_image, FrameResizer
+from .pipeline import Pipeline, PipelineConfigError, load_pipeline
+from .events import Signal, Events
 
 
 def sublist(lst1, lst2):
@@ -0,0 +1,54 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+import logging
+import threading
+
+
+class Signal:
+    """
+    Qt 없이 사용할 수 있는 pyqtSignal 대체
+    connect/disconnect/emit 만 지원하고, 슬롯은 emit 한 스레드에서 바로 호출
+    """
+
+    def __init__(self):
+        self._slots = []
+        self._lock = threading.Lock()
+
+    def connect(self, slot):
+        with self._lock:
+            self._slots.append(slot)
+
+    def disconnect(self, slot=None):
+        with self._lock:
+            if slot is None:
+                self._slots = []
+            else:
+                self._slots.remove(slot)
+
+    def emit(self, *args):
+        with self._lock:
+            slots = list(self._slots)
+
+        for slot in slots:
+            try:
+                slot(*args)
+            except Exception:
+                logging.exception('Error in signal slot {}'.format(slot))
+
+
+class Events:
+    """
+    카메라, 시리얼, 매크로 스레드가 사용하는 이벤트
+    DisplayWindowClass 와 같은 이름의 신호를 제공하므로 스레드의 parent 로 사용 가능
+    """
+
+    def __init__(self):
+        self.camera_connected = Signal()
+        self.camera_disconnected = Signal()
+        self.serial_connected = Signal()
+        self.serial_disconnected = Signal()
+        self.macro_finished = Signal()
+
+        self.camera_thread = None
+        self.serial_thread = None
@@ -1,39 +1,130 @@
 #!/usr/bin/python3
 # -*- coding: utf-8 -*-
 
+import atexit
+import copy
 import json
+import logging
+import os
+import tempfile
+import threading
+import time
 from collections import OrderedDict
 
+DATA_DIR = 'data'
+FLUSH_DELAY = 0.5
 
-def load_value(namespace, name, default=None):
-    filename = 'data/{}.json'.format(namespace)
 
-    try:
-        with open(filename) as data_file:
-            objects = json.load(data_file, object_pairs_hook=OrderedDict)
+class ConfigStore:
+    """
+    data/<namespace>.json 설정 파일의 메모리 캐시
+    - 각 namespace 는 처음 접근할 때 한 번만 파싱
+    - 저장은 메모리에만 반영하고, 백그라운드 스레드가 모아서 파일에 기록
+    - 파일 기록은 임시 파일에 쓴 뒤 rename 하므로 중간에 죽어도 파일이 깨지지 않음
+    """
 
-        if str(name) in objects.keys():
-            return objects[str(name)]
-    except FileNotFoundError:
-        pass
+    def __init__(self, data_dir=DATA_DIR, flush_delay=FLUSH_DELAY):
+        self.data_dir = data_dir
+        self.flush_delay = flush_delay
 
-    save_value(namespace, name, default)
-    return default
+        self._objects = {}
+        self._dirty = set()
+        self._lock = threading.RLock()
+        self._write_lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._writer = None
 
+    def filename(self, namespace):
+        return os.path.join(self.data_dir, '{}.json'.format(namespace))
 
-def save_value(namespace, name, data):
-    filename = 'data/{}.json'.format(namespace)
-    objects = {}
+    def _namespace(self, namespace):
+        objects = self._objects.get(namespace)
+        if objects is not None:
+            return objects
+
+        objects = OrderedDict()
+        try:
+            with open(self.filename(namespace)) as data_file:
+                objects = json.load(data_file, object_pairs_hook=OrderedDict)
+        except FileNotFoundError:
+            pass
+        except json.decoder.JSONDecodeError:
+            logging.error('Broken config file: {}'.format(self.filename(namespace)))
+
+        self._objects[namespace] = objects
+        return objects
+
+    def load(self, namespace, name, default=None):
+        with self._lock:
+            objects = self._namespace(namespace)
+            if str(name) in objects:
+                return copy.deepcopy(objects[str(name)])
+
+        self.save(namespace, name, default)
+        return default
+
+    def save(self, namespace, name, data):
+        with self._lock:
+            self._namespace(namespace)[str(name)] = copy.deepcopy(data)
+            self._dirty.add(namespace)
+            self._start_writer()
+            self._wakeup.notify()
+
+    def flush(self):
+        """변경된 namespace 를 즉시 파일에 기록"""
+        with self._write_lock:
+            with self._lock:
+                pending = [(namespace, json.dumps(self._objects[namespace], indent=2))
+                           for namespace in self._dirty]
+                self._dirty.clear()
+
+            for namespace, text in pending:
+                self._write(namespace, text)
+
+    def _write(self, namespace, text):
+        filename = self.filename(namespace)
+        directory = os.path.dirname(filename) or '.'
+        os.makedirs(directory, exist_ok=True)
+
+        fd, tmp_name = tempfile.mkstemp(prefix='.{}.'.format(namespace), suffix='.tmp', dir=directory)
+        try:
+            with os.fdopen(fd, 'w') as data_file:
+                data_file.write(text)
+                data_file.flush()
+                os.fsync(data_file.fileno())
+            os.replace(tmp_name, filename)
+        except OSError:
+            logging.error('Failed to write config file: {}'.format(filename))
+            if os.path.exists(tmp_name):
+                os.remove(tmp_name)
 
-    try:
-        with open(filename) as data_file:
-            objects = json.load(data_file, object_pairs_hook=OrderedDict)
-    except FileNotFoundError:
-        pass
-    except json.decoder.JSONDecodeError:
-        pass
+    def _start_writer(self):
+        if self._writer is None:
+            self._writer = threading.Thread(target=self._run_writer, name='ConfigWriter', daemon=True)
+            self._writer.start()
+
+    def _run_writer(self):
+        while True:
+            with self._lock:
+                while not self._dirty:
+                    self._wakeup.wait()
+
+            # 짧은 시간 동안 들어오는 저장 요청은 한 번에 기록
+            time.sleep(self.flush_delay)
+            self.flush()
+
+
+store = ConfigStore()
+atexit.register(store.flush)
+
+
+def load_value(namespace, name, default=None):
+    return store.load(namespace, name, default)
+
+
+def save_value(namespace, name, data):
+    store.save(namespace, name, data)
 
-    objects[str(name)] = data
 
-    with open(filename, 'w') as data_file:
-        json.dump(objects, data_file, indent=2)
+def flush():
+    store.flush()
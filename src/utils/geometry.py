@@ -0,0 +1,86 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+"""
+상자(box) 묶음에 대한 NumPy 벡터 연산
+- 점: (..., 2), 상자: (N, 4, 2) 의 4점 (tl, tr, br, bl), draw_rectangle 과 같은 형식
+- 상자 하나만 넘겨도 (4, 2) 를 (1, 4, 2) 로 처리
+"""
+
+import numpy as np
+
+
+def as_boxes(boxes):
+    boxes = np.asarray(boxes, dtype=np.float64)
+    return boxes.reshape(1, 4, 2) if boxes.ndim == 2 else boxes
+
+
+def distances(points1, points2, squared=False):
+    """
+    두 점 목록 사이의 모든 거리
+    :param points1: (N, 2)
+    :param points2: (M, 2)
+    :param squared: 제곱 거리를 반환 (크기 비교만 할 때는 sqrt 를 생략)
+    :return: (N, M)
+    """
+    points1 = np.asarray(points1, dtype=np.float64).reshape(-1, 2)
+    points2 = np.asarray(points2, dtype=np.float64).reshape(-1, 2)
+    diff = points1[:, None, :] - points2[None, :, :]
+    result = np.einsum('nmk,nmk->nm', diff, diff)
+    return result if squared else np.sqrt(result)
+
+
+def order_points(points):
+    """
+    꼭짓점 순서를 유지한 채 x + y 가 가장 작은 점부터 화면 기준 시계 방향(tl, tr, br, bl)으로 정렬
+    :param points: cv2.boxPoints 결과를 쌓은 (N, 4, 2)
+    """
+    points = np.asarray(points)
+    x, y = points[:, :, 0], points[:, :, 1]
+    clockwise = (x * np.roll(y, -1, axis=1) - np.roll(x, -1, axis=1) * y).sum(axis=1) >= 0
+    step = np.where(clockwise, 1, -1)[:, None]
+    order = (points.sum(axis=2).argmin(axis=1)[:, None] + step * np.arange(4)) % 4
+    return points[np.arange(len(points))[:, None], order]
+
+
+def midpoints(boxes):
+    """
+    :return: (N, 4, 2) 변의 중점 (tl-tr, tr-br, br-bl, bl-tl)
+    """
+    boxes = as_boxes(boxes)
+    return (boxes + np.roll(boxes, -1, axis=1)) * 0.5
+
+
+def sides(boxes):
+    """
+    마주 보는 변의 중점 사이 거리
+    :return: (N, 2) (높이: 위-아래 변 중점 거리, 폭: 왼쪽-오른쪽 변 중점 거리)
+    """
+    mid = midpoints(boxes)
+    height = np.linalg.norm(mid[:, 0] - mid[:, 2], axis=1)
+    width = np.linalg.norm(mid[:, 1] - mid[:, 3], axis=1)
+    return np.stack([height, width], axis=1)
+
+
+def areas(boxes):
+    """:return: (N,) 신발끈 공식으로 구한 면적"""
+    boxes = as_boxes(boxes)
+    x, y = boxes[:, :, 0], boxes[:, :, 1]
+    return np.abs((x * np.roll(y, -1, axis=1) - np.roll(x, -1, axis=1) * y).sum(axis=1)) * 0.5
+
+
+def centers(boxes):
+    """:return: (N, 2) 꼭짓점의 평균"""
+    return as_boxes(boxes).mean(axis=1)
+
+
+def min_distances(boxes1, boxes2):
+    """
+    모든 상자 쌍의 가장 가까운 꼭짓점 사이 거리
+    :param boxes1: (N, 4, 2)
+    :param boxes2: (M, 4, 2)
+    :return: (N, M)
+    """
+    boxes1, boxes2 = as_boxes(boxes1), as_boxes(boxes2)
+    n, m = len(boxes1), len(boxes2)
+    squared = distances(boxes1.reshape(-1, 2), boxes2.reshape(-1, 2), squared=True)
+    return np.sqrt(squared.reshape(n, 4, m, 4).min(axis=(1, 3)))
@@ -1,21 +1,41 @@
-import cv2
-from scipy.spatial import distance as dist
+import numpy as np
 
+from utils import geometry
+from utils.startup import lazy_import
 
-def midpoint(point1, point2):
-    return (point1[0] + point2[0]) * 0.5, (point1[1] + point2[1]) * 0.5
+cv2 = lazy_import('cv2')
 
 
-def get_blurred_image(image):
-    # TODO: 설정 화면을 통해서 블러 알고리즘 및 매개변수를 설정할수 있도록 변경
-    blurred = cv2.GaussianBlur(image, (13, 13), 0)
-    # blurred = cv2.medianBlur(image, 5)
-    return blurred
+def blur(image, method='gaussian', ksize=13, sigma=0, dst=None):
+    """
+    이미지 블러
+    :param method: 블러 알고리즘
+                    - gaussian: 가우시안 블러(Default)
+                    - median: 중간값 블러, 소금-후추 잡음에 강함
+                    - box: 평균 블러, 가장 빠름
+                    - bilateral: 경계를 보존하는 블러, 가장 느림 (ksize 는 지름, sigma 는 색/공간 시그마)
+    :param ksize: 커널 크기 (홀수)
+    :param dst: 결과를 기록할 미리 할당된 배열
+    """
+    if method == 'gaussian':
+        return cv2.GaussianBlur(image, (ksize, ksize), sigma, dst=dst)
+    if method == 'median':
+        return cv2.medianBlur(image, ksize, dst=dst)
+    if method == 'box':
+        return cv2.blur(image, (ksize, ksize), dst=dst)
+    if method == 'bilateral':
+        return cv2.bilateralFilter(image, ksize, sigma or 75, sigma or 75, dst=dst)
+    raise ValueError('Unknown blur method: {}'.format(method))
+
+
+def get_blurred_image(image, method='gaussian', ksize=13):
+    return blur(image, method, ksize)
 
 
 def resize_image(img, width, height, interpolation='INTER_LINEAR'):
     """
     이미지 크기 변경
+    비전 처리에서는 utils.pipeline 의 resize 단계 설정(interpolation)으로 보간법을 선택
     :param interpolation: 보간법
                             - INTER_LINEAR: 양선형 보간법(Default)
                             - INTER_AREA: 픽셀 영역 재 샘플링
@@ -26,7 +46,6 @@ def resize_image(img, width, height, interpolation='INTER_LINEAR'):
     :param height:
     :return:
     """
-    # TODO: 설정 화면을 통해서 선택 가능하도록 변경
     img_height, img_width, img_colors = img.shape
     scale_w = float(width) / float(img_width)
     scale_h = float(height) / float(img_height)
@@ -39,6 +58,49 @@ def resize_image(img, width, height, interpolation='INTER_LINEAR'):
     return cv2.resize(img, None, fx=scale, fy=scale, interpolation=interpolation)
 
 
+class FrameResizer:
+    """
+    화면 출력용 크기 변경 및 색 변환
+    - 배율과 dsize 는 입력 해상도가 바뀔 때만 다시 계산
+    - 결과는 미리 할당된 버퍼(dst)에 기록하므로 프레임마다 배열을 새로 만들지 않음
+    - 반환된 배열은 다음 convert() 호출 때 덮어써짐
+    """
+
+    def __init__(self, width, height, interpolation='INTER_LINEAR', code=None):
+        self.width, self.height = width, height
+        self.interpolation = getattr(cv2, interpolation)
+        self.code = code if code is not None else cv2.COLOR_BGR2RGB
+
+        self.src_shape = None
+        self.dsize = None
+        self.resized = None
+        self.converted = None
+
+    def setup(self, shape):
+        img_height, img_width, img_colors = shape
+        scale = min(float(self.width) / float(img_width), float(self.height) / float(img_height))
+        if scale == 0:
+            scale = 1
+
+        self.src_shape = shape
+        self.dsize = (int(round(img_width * scale)), int(round(img_height * scale)))
+        if self.dsize == (img_width, img_height):
+            self.resized = None
+        else:
+            self.resized = np.empty((self.dsize[1], self.dsize[0], img_colors), dtype=np.uint8)
+        self.converted = np.empty((self.dsize[1], self.dsize[0], 3), dtype=np.uint8)
+
+    def convert(self, img):
+        if img.shape != self.src_shape:
+            self.setup(img.shape)
+
+        if self.resized is not None:
+            cv2.resize(img, self.dsize, dst=self.resized, interpolation=self.interpolation)
+            img = self.resized
+        cv2.cvtColor(img, self.code, dst=self.converted)
+        return self.converted
+
+
 def draw_rectangle(img, box, color=(0, 0, 0), width=4, display_info=False):
     if img is None or box is None:
         return img
@@ -51,17 +113,9 @@ def draw_rectangle(img, box, color=(0, 0, 0), width=4, display_info=False):
         cv2.circle(img, (int(x), int(y)), 5, (0, 0, 255), -1)
 
     if display_info:
-        # unpack the ordered bounding box, then compute the midpoint
-        # between the top-left and top-right coordinates, followed by
-        # the midpoint between bottom-left and bottom-right coordinates
-        (tl, tr, br, bl) = box
-        (tltrX, tltrY) = midpoint(tl, tr)
-        (blbrX, blbrY) = midpoint(bl, br)
-
-        # compute the midpoint between the top-left and bottom-left points,
-        # followed by the midpoint between the top-right and bottom-right
-        (tlblX, tlblY) = midpoint(tl, bl)
-        (trbrX, trbrY) = midpoint(tr, br)
+        # compute the midpoints of the ordered bounding box edges:
+        # top-left/top-right, top-right/bottom-right, bottom-right/bottom-left, bottom-left/top-left
+        ((tltrX, tltrY), (trbrX, trbrY), (blbrX, blbrY), (tlblX, tlblY)) = geometry.midpoints(box)[0]
 
         # draw the midpoints on the image
         cv2.circle(img, (int(tltrX), int(tltrY)), 5, (255, 0, 0), -1)
@@ -76,8 +130,7 @@ def draw_rectangle(img, box, color=(0, 0, 0), width=4, display_info=False):
                  (255, 0, 255), 2)
 
         # compute the Euclidean distance between the midpoints
-        dA = dist.euclidean((tltrX, tltrY), (blbrX, blbrY))
-        dB = dist.euclidean((tlblX, tlblY), (trbrX, trbrY))
+        dA, dB = geometry.sides(box)[0]
 
         # draw the object sizes on the image
         cv2.putText(img, "{}px".format(int(dA)),
@@ -94,11 +147,9 @@ def draw_rectangle(img, box, color=(0, 0, 0), width=4, display_info=False):
 
 
 def rect_min_dist(rect1, rect2):
-    min_dist = 99999
-
-    for point1 in rect1:
-        for point2 in rect2:
-            cur_dist = dist.euclidean(point1, point2)
-            min_dist = cur_dist if cur_dist < min_dist else min_dist
-
-    return min_dist
+    """
+    두 점 집합의 가장 가까운 점 사이 거리, 점 개수는 상관없음
+    여러 상자를 한 번에 비교할 때는 geometry.min_distances 사용
+    """
+    dist = geometry.distances(rect1, rect2, squared=True)
+    return float(np.sqrt(dist.min())) if dist.size else 99999
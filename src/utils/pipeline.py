@@ -0,0 +1,294 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+import abc
+import time
+
+import numpy as np
+
+from utils import geometry
+from utils.file_control import load_value
+from utils.image import blur
+from utils.probe import Probes
+from utils.startup import lazy_import
+
+cv2 = lazy_import('cv2')
+
+# 공 찾기 기본 설정: 주황색 HSV 범위
+DEFAULT_PIPELINE = [
+    {'stage': 'resize', 'width': 320, 'height': 240},
+    {'stage': 'blur', 'method': 'gaussian', 'ksize': 5},
+    {'stage': 'color', 'code': 'COLOR_BGR2HSV'},
+    {'stage': 'threshold', 'lower': [0, 120, 120], 'upper': [20, 255, 255]},
+    {'stage': 'morphology', 'op': 'open', 'ksize': 5, 'shape': 'ellipse', 'iterations': 1},
+    {'stage': 'contours', 'min_area': 50},
+    {'stage': 'boxes'},
+]
+
+
+class PipelineConfigError(ValueError):
+    pass
+
+
+class Stage(abc.ABC):
+    """
+    파이프라인 단계
+    - 하위 클래스는 process(data, context) 에서 이전 단계의 결과를 받아 다음 단계로 넘길 결과를 반환
+    - 결과 배열은 입력 크기가 바뀔 때만 새로 할당하고 이후 프레임에서는 같은 버퍼에 기록
+    """
+    name = None
+
+    def __init__(self):
+        self.dst = None
+
+    def buffer(self, shape, dtype=np.uint8):
+        if self.dst is None or self.dst.shape != shape or self.dst.dtype != dtype:
+            self.dst = np.empty(shape, dtype=dtype)
+        return self.dst
+
+    @abc.abstractmethod
+    def process(self, data, context):
+        pass
+
+    def __getstate__(self):
+        # 작업 프로세스로 보낼 때 버퍼는 제외
+        state = self.__dict__.copy()
+        state['dst'] = None
+        return state
+
+
+class ResizeStage(Stage):
+    """
+    width x height 안에 들어가도록 비율을 유지해서 축소, 배율은 context['scale'] 에 기록
+    :param interpolation: cv2 보간법 이름 (INTERPOLATIONS 중 하나)
+    """
+    name = 'resize'
+
+    INTERPOLATIONS = ('INTER_NEAREST', 'INTER_LINEAR', 'INTER_AREA', 'INTER_CUBIC', 'INTER_LANCZOS4')
+
+    def __init__(self, width, height, interpolation='INTER_AREA'):
+        super().__init__()
+        if interpolation not in self.INTERPOLATIONS:
+            raise PipelineConfigError('Unknown interpolation: {}'.format(interpolation))
+        self.width, self.height = width, height
+        self.interpolation = interpolation
+        self.src_shape = None
+        self.dsize = None
+        self.scale = 1.0
+
+    def setup(self, shape):
+        img_height, img_width = shape[:2]
+        scale = min(float(self.width) / img_width, float(self.height) / img_height, 1.0)
+        self.src_shape = shape
+        self.scale = scale
+        self.dsize = (int(round(img_width * scale)), int(round(img_height * scale)))
+
+    def process(self, image, context):
+        if image.shape != self.src_shape:
+            self.setup(image.shape)
+        if self.scale == 1.0:
+            return image
+
+        context['scale'] *= self.scale
+        dst = self.buffer((self.dsize[1], self.dsize[0]) + image.shape[2:], image.dtype)
+        return cv2.resize(image, self.dsize, dst=dst, interpolation=getattr(cv2, self.interpolation))
+
+
+class BlurStage(Stage):
+    """utils.image.blur 참고"""
+    name = 'blur'
+
+    def __init__(self, method='gaussian', ksize=5, sigma=0):
+        super().__init__()
+        self.method, self.ksize, self.sigma = method, ksize, sigma
+
+    def process(self, image, context):
+        return blur(image, self.method, self.ksize, self.sigma, dst=self.buffer(image.shape, image.dtype))
+
+
+class ColorStage(Stage):
+    """:param code: cv2 색 변환 코드 이름 (예: COLOR_BGR2HSV, COLOR_BGR2GRAY)"""
+    name = 'color'
+
+    def __init__(self, code='COLOR_BGR2HSV'):
+        super().__init__()
+        self.code = code
+
+    def process(self, image, context):
+        code = getattr(cv2, self.code)
+        channels = 1 if self.code.endswith('GRAY') else 3
+        shape = image.shape[:2] if channels == 1 else image.shape[:2] + (channels,)
+        return cv2.cvtColor(image, code, dst=self.buffer(shape, image.dtype))
+
+
+class ThresholdStage(Stage):
+    """
+    이진화
+    - lower/upper 가 있으면 채널별 범위 (cv2.inRange)
+    - 없으면 단일 채널 임계값 (cv2.threshold), method 는 THRESH_BINARY, THRESH_OTSU 등을 '+' 로 연결
+    """
+    name = 'threshold'
+
+    def __init__(self, lower=None, upper=None, thresh=127, maxval=255, method='THRESH_BINARY'):
+        super().__init__()
+        self.lower = np.array(lower, dtype=np.uint8) if lower is not None else None
+        self.upper = np.array(upper, dtype=np.uint8) if upper is not None else None
+        self.thresh, self.maxval, self.method = thresh, maxval, method
+
+    def process(self, image, context):
+        dst = self.buffer(image.shape[:2])
+        if self.lower is not None:
+            return cv2.inRange(image, self.lower, self.upper, dst=dst)
+
+        if image.ndim != 2:
+            raise PipelineConfigError('threshold without lower/upper needs a single channel image')
+        method = sum(getattr(cv2, name.strip()) for name in self.method.split('+'))
+        _, mask = cv2.threshold(image, self.thresh, self.maxval, method, dst=dst)
+        return mask
+
+
+class MorphologyStage(Stage):
+    """:param op: open, close, erode, dilate, gradient"""
+    name = 'morphology'
+
+    OPS = {
+        'open': 'MORPH_OPEN',
+        'close': 'MORPH_CLOSE',
+        'erode': 'MORPH_ERODE',
+        'dilate': 'MORPH_DILATE',
+        'gradient': 'MORPH_GRADIENT',
+    }
+    SHAPES = {
+        'rect': 'MORPH_RECT',
+        'ellipse': 'MORPH_ELLIPSE',
+        'cross': 'MORPH_CROSS',
+    }
+
+    def __init__(self, op='open', ksize=5, shape='ellipse', iterations=1):
+        super().__init__()
+        if op not in self.OPS:
+            raise PipelineConfigError('Unknown morphology: {}'.format(op))
+        if shape not in self.SHAPES:
+            raise PipelineConfigError('Unknown kernel shape: {}'.format(shape))
+        self.op, self.ksize, self.shape, self.iterations = op, ksize, shape, iterations
+        self.kernel = None
+
+    def process(self, mask, context):
+        if self.kernel is None:
+            self.kernel = cv2.getStructuringElement(getattr(cv2, self.SHAPES[self.shape]), (self.ksize, self.ksize))
+        return cv2.morphologyEx(mask, getattr(cv2, self.OPS[self.op]), self.kernel,
+                                dst=self.buffer(mask.shape, mask.dtype), iterations=self.iterations)
+
+
+class ContourStage(Stage):
+    """바깥 윤곽선 중 면적이 [min_area, max_area] 인 것만 남김 (면적은 축소 전 해상도 기준)"""
+    name = 'contours'
+
+    def __init__(self, min_area=50, max_area=None):
+        super().__init__()
+        self.min_area, self.max_area = min_area, max_area
+
+    def process(self, mask, context):
+        if mask.ndim != 2:
+            raise PipelineConfigError('contours needs a binary mask, add a threshold stage first')
+
+        # OpenCV 3 은 (image, contours, hierarchy), 4 는 (contours, hierarchy)
+        contours = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)[-2]
+        area_scale = context['scale'] ** 2
+        result = []
+        for contour in contours:
+            area = cv2.contourArea(contour) / area_scale
+            if area < self.min_area or (self.max_area is not None and area > self.max_area):
+                continue
+            result.append(contour)
+        return result
+
+
+class BoxStage(Stage):
+    """
+    윤곽선을 회전된 사각형으로 변환
+    :return: (boxes, centroids) boxes 는 draw_rectangle 형식의 (N, 4, 2) int32 (tl, tr, br, bl),
+             centroids 는 (N, 2) float32, 모두 입력 프레임 좌표
+    """
+    name = 'boxes'
+
+    def process(self, contours, context):
+        if not contours:
+            return np.zeros((0, 4, 2), dtype=np.int32), np.zeros((0, 2), dtype=np.float32)
+
+        rects = [cv2.minAreaRect(contour) for contour in contours]
+        points = np.array([cv2.boxPoints(rect) for rect in rects], dtype=np.float32)
+        centroids = np.array([rect[0] for rect in rects], dtype=np.float32)
+
+        scale = context['scale']
+        if scale != 1.0:
+            points /= scale
+            centroids /= scale
+
+        boxes = np.rint(geometry.order_points(points)).astype(np.int32)
+        return boxes, centroids
+
+
+STAGES = {stage.name: stage for stage in (
+    ResizeStage, BlurStage, ColorStage, ThresholdStage, MorphologyStage, ContourStage, BoxStage)}
+
+
+class Pipeline:
+    """
+    설정으로 만드는 비전 처리 단계 목록
+    사용 예)
+        pipeline = Pipeline.from_config(load_value('vision', 'pipeline', DEFAULT_PIPELINE))
+        boxes, centroids = pipeline(image)
+    - 단계별 처리 시간은 timing (utils.probe.Probes) 에 기록
+    - 호출할 수 있는 객체이므로 threads.vision_pool.VisionPool 의 target 으로 사용 가능
+    """
+
+    def __init__(self, stages):
+        self.stages = stages
+        self.timing = Probes()
+
+    @classmethod
+    def from_config(cls, config):
+        """
+        :param config: [{'stage': 이름, 매개변수...}, ...]
+        """
+        stages = []
+        for idx, item in enumerate(config):
+            params = dict(item)
+            name = params.pop('stage', None)
+            if name not in STAGES:
+                raise PipelineConfigError('Unknown stage "{}" at {}'.format(name, idx + 1))
+            try:
+                stages.append(STAGES[name](**params))
+            except TypeError as e:
+                raise PipelineConfigError('Invalid parameters for stage "{}": {}'.format(name, e))
+
+        if not stages or stages[-1].name != 'boxes':
+            raise PipelineConfigError('Pipeline must end with a boxes stage')
+        return cls(stages)
+
+    def run(self, image):
+        data = image
+        context = {'scale': 1.0}
+        for stage in self.stages:
+            start = time.perf_counter()
+            data = stage.process(data, context)
+            self.timing.record(stage.name, time.perf_counter() - start)
+        return data
+
+    def __call__(self, image):
+        return self.run(image)
+
+    def __getstate__(self):
+        # 작업 프로세스에서는 새 Probes 로 시간을 기록
+        state = self.__dict__.copy()
+        del state['timing']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.timing = Probes()
+
+
+def load_pipeline(namespace='vision', name='pipeline'):
+    return Pipeline.from_config(load_value(namespace, name, DEFAULT_PIPELINE))
@@ -0,0 +1,124 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+import json
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+# 1us ~ 100s 구간을 10년(decade)당 20개 로그 구간으로 나눔
+MIN_VALUE = 1e-6
+BUCKETS_PER_DECADE = 20
+DECADES = 8
+
+
+class Histogram:
+    """
+    로그 구간 히스토그램
+    기록은 구간 카운트 증가뿐이므로 hot path 에서도 부담이 작음
+    여러 스레드(카메라, 추적, 비전 등)가 같은 히스토그램에 기록하므로 갱신과 조회는 잠금 안에서 함
+    """
+
+    def __init__(self):
+        self.buckets = [0] * (BUCKETS_PER_DECADE * DECADES + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, value):
+        if value > MIN_VALUE:
+            idx = min(int(math.log10(value / MIN_VALUE) * BUCKETS_PER_DECADE), len(self.buckets) - 1)
+        else:
+            idx = 0
+        with self._lock:
+            self.buckets[idx] += 1
+            self.count += 1
+            self.total += value
+            if value > self.max:
+                self.max = value
+
+    def percentile(self, p):
+        """
+        :param p: 0 ~ 100
+        :return: 해당 구간의 상한값(초)
+        """
+        with self._lock:
+            return self._percentile(p)
+
+    def _percentile(self, p):
+        if not self.count:
+            return 0.0
+
+        target = self.count * p / 100.0
+        seen = 0
+        for idx, n in enumerate(self.buckets):
+            seen += n
+            if seen >= target:
+                return min(MIN_VALUE * 10 ** ((idx + 1) / float(BUCKETS_PER_DECADE)), self.max)
+        return self.max
+
+    def summary(self):
+        with self._lock:
+            return {
+                'count': self.count,
+                'mean': self.total / self.count if self.count else 0.0,
+                'p50': self._percentile(50),
+                'p95': self._percentile(95),
+                'p99': self._percentile(99),
+                'max': self.max,
+            }
+
+
+class Probes:
+    """
+    구간별 소요 시간 히스토그램 모음
+    사용 예)
+        with probes.measure('display.convert'):
+            ...
+        probes.record('serial.send', handle.latency)
+    """
+
+    def __init__(self):
+        self.enabled = True
+        self.histograms = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, stage):
+        hist = self.histograms.get(stage)
+        if hist is None:
+            with self._lock:
+                hist = self.histograms.setdefault(stage, Histogram())
+        return hist
+
+    def record(self, stage, seconds):
+        if self.enabled and seconds is not None:
+            self.histogram(stage).record(seconds)
+
+    @contextmanager
+    def measure(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - start)
+
+    def reset(self):
+        with self._lock:
+            self.histograms = {}
+
+    def summary(self):
+        return {stage: hist.summary() for stage, hist in sorted(self.histograms.items())}
+
+    def status_text(self):
+        """상태 표시줄용 요약 (단위 ms)"""
+        return '  '.join('{} p50 {:.1f} p95 {:.1f} p99 {:.1f}'.format(
+            stage, s['p50'] * 1000, s['p95'] * 1000, s['p99'] * 1000) for stage, s in self.summary().items())
+
+    def export(self, filename):
+        with open(filename, 'w') as f:
+            json.dump(self.summary(), f, indent=2)
+
+
+probes = Probes()
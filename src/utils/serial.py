@@ -1,7 +1,54 @@
-import os
+import logging
+import threading
 
+from serial.tools import list_ports
 
-def get_serial_port_list():
-    output = os.popen('python -m serial.tools.list_ports', 'r')
-    serials = output.read()
-    return serials.split()
+WATCH_INTERVAL = 1.0
+
+_ports = None
+_lock = threading.Lock()
+
+
+def get_serial_port_list(refresh=False):
+    """
+    사용 가능한 시리얼 포트 목록
+    :param refresh: True 이면 캐시를 무시하고 다시 조회
+    :return: 장치 이름 목록
+    """
+    global _ports
+
+    with _lock:
+        if _ports is None or refresh:
+            _ports = sorted(port.device for port in list_ports.comports())
+        return list(_ports)
+
+
+class SerialPortWatcher(threading.Thread):
+    """
+    USB 시리얼 어댑터 연결/해제 감시
+    포트 목록이 바뀌면 callback(port_list) 호출
+    """
+
+    def __init__(self, callback, interval=WATCH_INTERVAL):
+        threading.Thread.__init__(self, name='SerialPortWatcher', daemon=True)
+        self.callback = callback
+        self.interval = interval
+        self._stop_event = threading.Event()
+
+    def run(self):
+        ports = get_serial_port_list()
+        while not self._stop_event.wait(self.interval):
+            new_ports = get_serial_port_list(refresh=True)
+            if new_ports == ports:
+                continue
+
+            for port in set(new_ports) - set(ports):
+                logging.info('Serial port added: {}'.format(port))
+            for port in set(ports) - set(new_ports):
+                logging.info('Serial port removed: {}'.format(port))
+
+            ports = new_ports
+            self.callback(new_ports)
+
+    def stop(self):
+        self._stop_event.set()
@@ -0,0 +1,52 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+import importlib
+import logging
+import time
+import types
+from contextlib import contextmanager
+
+_started = time.perf_counter()
+_phases = []
+
+
+class LazyModule(types.ModuleType):
+    """처음 속성에 접근할 때 실제 모듈을 import 하는 대리 모듈"""
+
+    def __getattr__(self, attr):
+        with phase('import {}'.format(self.__name__)):
+            module = importlib.import_module(self.__name__)
+        self.__dict__.update(module.__dict__)
+        return getattr(module, attr)
+
+
+def lazy_import(name):
+    """
+    무거운 모듈(cv2 등)의 import 를 처음 사용할 때까지 미룸
+    :param name: 모듈 이름
+    :return: LazyModule
+    """
+    return LazyModule(name)
+
+
+@contextmanager
+def phase(name):
+    """시작 단계별 소요 시간 기록"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _phases.append((name, start - _started, time.perf_counter() - start))
+
+
+def report():
+    """
+    단계별 소요 시간을 로그로 출력
+    :return: (name, 시작 시각, 소요 시간) 목록
+    """
+    total = time.perf_counter() - _started
+    for name, start, elapsed in _phases:
+        logging.info('[Startup] {:<30} +{:7.1f}ms {:7.1f}ms'.format(name, start * 1000, elapsed * 1000))
+    logging.info('[Startup] {:<30} {:7.1f}ms'.format('total', total * 1000))
+    return list(_phases)
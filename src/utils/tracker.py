@@ -0,0 +1,210 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+import math
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from utils import geometry
+from utils.probe import Probes
+
+# box: (4, 2) int32 (tl, tr, br, bl), 이번 프레임에서 찾지 못했으면 예측 위치로 옮긴 이전 상자
+# center, velocity: 픽셀, 픽셀/초
+# detected: 이번 프레임에서 실제로 찾았으면 True
+Track = namedtuple('Track', ['box', 'center', 'velocity', 'detected', 'age', 'misses'])
+
+
+class ConstantVelocityKalman:
+    """
+    상태 (x, y, vx, vy) 의 등속도 칼만 필터
+    :param process_noise: 가속도 잡음 (픽셀/초^2)
+    :param measurement_noise: 측정 위치 잡음 (픽셀)
+    """
+
+    def __init__(self, process_noise=200.0, measurement_noise=3.0):
+        self.process_noise = process_noise
+        self.measurement_noise = measurement_noise
+        self.state = np.zeros(4)
+        self.covariance = np.eye(4)
+
+        self._H = np.array([[1.0, 0, 0, 0], [0, 1.0, 0, 0]])
+        self._R = np.eye(2) * measurement_noise ** 2
+
+    def init(self, center):
+        self.state[:] = (center[0], center[1], 0.0, 0.0)
+        self.covariance = np.diag([self.measurement_noise ** 2] * 2 + [100.0 ** 2] * 2)
+
+    def predict(self, dt):
+        F = np.eye(4)
+        F[0, 2] = F[1, 3] = dt
+
+        # 가속도를 백색 잡음으로 보는 이산화된 공정 잡음
+        q = self.process_noise ** 2
+        dt2, dt3, dt4 = dt * dt, dt ** 3 / 2, dt ** 4 / 4
+        Q = np.array([[dt4, 0, dt3, 0], [0, dt4, 0, dt3], [dt3, 0, dt2, 0], [0, dt3, 0, dt2]]) * q
+
+        self.state = F @ self.state
+        self.covariance = F @ self.covariance @ F.T + Q
+        return self.state[:2]
+
+    def update(self, center):
+        H = self._H
+        innovation = np.asarray(center, dtype=np.float64) - H @ self.state
+        S = H @ self.covariance @ H.T + self._R
+        K = self.covariance @ H.T @ np.linalg.inv(S)
+        self.state = self.state + K @ innovation
+        self.covariance = (np.eye(4) - K @ H) @ self.covariance
+
+    @property
+    def position_sigma(self):
+        """위치 불확실성(픽셀, x/y 중 큰 값)"""
+        return math.sqrt(max(self.covariance[0, 0], self.covariance[1, 1]))
+
+
+class RoiTracker:
+    """
+    한 물체를 따라가는 ROI 추적기
+    - 추적 중에는 칼만 필터로 예측한 위치 주변의 ROI 에서만 detector 를 실행
+    - ROI 에서 max_misses 번 연속으로 놓치면 추적을 잃은 것으로 보고 다음 프레임에서 전체 화면을 다시 검색
+    - ROI 크기는 16 픽셀 단위로 맞춰서 detector 의 버퍼가 프레임마다 새로 할당되지 않도록 함
+    :param detector: detector(image) -> (boxes, centroids), 예) utils.pipeline.Pipeline
+    :param padding: 상자 크기 대비 ROI 크기 배율
+    :param min_roi: ROI 의 최소 한 변 크기(픽셀)
+    :param gate: 예측 위치에서 이 거리(픽셀, 상자 크기 기준 배율) 안의 후보만 같은 물체로 봄
+    """
+
+    ROI_STEP = 16
+
+    def __init__(self, detector, padding=2.5, min_roi=64, max_misses=3, gate=1.5, kalman=None):
+        self.detector = detector
+        self.padding = padding
+        self.min_roi = min_roi
+        self.max_misses = max_misses
+        self.gate = gate
+        self.kalman = kalman if kalman is not None else ConstantVelocityKalman()
+
+        self.track = None
+        self.roi = None
+        self._box = None
+        self._center = None
+        self._size = 0.0
+        self._timestamp = None
+
+        # 통계
+        self.timing = Probes()
+        self.frames = 0
+        self.roi_searches = 0
+        self.hits = 0
+        self.redetects = 0
+        self.lost = 0
+
+    def reset(self):
+        self.track = None
+        self.roi = None
+        self._box = None
+        self._center = None
+        self._timestamp = None
+
+    def update(self, image, timestamp=None):
+        """
+        :param image: 전체 프레임
+        :param timestamp: 캡처 시각(초), 없으면 현재 시각
+        :return: Track, 추적 중인 물체가 없으면 None
+        """
+        if timestamp is None:
+            timestamp = time.monotonic()
+
+        start = time.perf_counter()
+        self.frames += 1
+        if self.track is None:
+            self._detect(image, timestamp)
+            self.timing.record('full', time.perf_counter() - start)
+        else:
+            self._search(image, timestamp)
+            self.timing.record('roi', time.perf_counter() - start)
+        self.timing.record('frame', time.perf_counter() - start)
+        return self.track
+
+    def _detect(self, image, timestamp):
+        boxes, centroids = self.detector(image)
+        if not len(boxes):
+            return
+
+        # 가장 큰 물체부터 추적
+        idx = int(geometry.areas(boxes).argmax())
+        if self._timestamp is not None:
+            self.redetects += 1
+        self.kalman.init(centroids[idx])
+        self._set_box(boxes[idx], centroids[idx])
+        self._timestamp = timestamp
+        self.track = Track(self._box, tuple(centroids[idx]), (0.0, 0.0), True, 1, 0)
+
+    def _search(self, image, timestamp):
+        dt = max(timestamp - self._timestamp, 1e-3)
+        self._timestamp = timestamp
+        predicted = self.kalman.predict(dt)
+
+        self.roi = self._roi(predicted, image.shape)
+        x0, y0, x1, y1 = self.roi
+        self.roi_searches += 1
+        boxes, centroids = self.detector(image[y0:y1, x0:x1])
+
+        track = self.track
+        if len(boxes):
+            offset = np.array([x0, y0])
+            centroids = centroids + offset
+            dist = geometry.distances(predicted, centroids)[0]
+            idx = int(dist.argmin())
+            if dist[idx] <= max(self._size * self.gate, 3 * self.kalman.position_sigma):
+                self.hits += 1
+                self.kalman.update(centroids[idx])
+                self._set_box(boxes[idx] + offset, centroids[idx])
+                self.track = Track(self._box, tuple(self.kalman.state[:2]), tuple(self.kalman.state[2:]),
+                                   True, track.age + 1, 0)
+                return
+
+        misses = track.misses + 1
+        if misses > self.max_misses:
+            self.lost += 1
+            self.track = None
+            self.roi = None
+            return
+
+        # 찾지 못한 동안은 마지막으로 찾은 상자를 그 중심에서 예측 위치까지 옮겨서 유지
+        box = np.rint(self._box + (predicted - self._center)).astype(np.int32)
+        self.track = Track(box, tuple(predicted), tuple(self.kalman.state[2:]), False, track.age + 1, misses)
+
+    def _set_box(self, box, center):
+        self._box = np.asarray(box, dtype=np.int32)
+        self._center = np.asarray(center, dtype=np.float64)
+        self._size = float(geometry.sides(self._box).max())
+
+    def _roi(self, center, shape):
+        """:return: 예측 위치를 중심으로 한 (x0, y0, x1, y1), 프레임 안으로 자름"""
+        height, width = shape[:2]
+        side = max(self._size * self.padding + 6 * self.kalman.position_sigma, self.min_roi)
+        side = int(math.ceil(side / self.ROI_STEP)) * self.ROI_STEP
+        w, h = min(side, width), min(side, height)
+
+        x0 = int(min(max(center[0] - w / 2, 0), width - w))
+        y0 = int(min(max(center[1] - h / 2, 0), height - h))
+        return x0, y0, x0 + w, y0 + h
+
+    @property
+    def hit_rate(self):
+        return self.hits / self.roi_searches if self.roi_searches else 0.0
+
+    def get_stats(self):
+        frame = self.timing.histogram('frame').summary()
+        return {
+            'frames': self.frames,
+            'roi_searches': self.roi_searches,
+            'hit_rate': self.hit_rate,
+            'redetects': self.redetects,
+            'lost': self.lost,
+            'frame_ms': frame['mean'] * 1000,
+            'roi_ms': self.timing.histogram('roi').summary()['mean'] * 1000,
+            'full_ms': self.timing.histogram('full').summary()['mean'] * 1000,
+        }
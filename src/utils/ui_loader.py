@@ -0,0 +1,64 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+import hashlib
+import importlib.util
+import logging
+import os
+
+CACHE_DIR = '.uicache'
+
+
+def load_ui_type(ui_file, cache_dir=None):
+    """
+    uic.loadUiType 대신 .ui 파일을 파이썬 모듈로 컴파일해서 캐시한 뒤 import
+    - 캐시는 .ui 파일 내용의 해시로 구분하므로 디자이너 파일이 바뀔 때만 다시 생성
+    - 생성된 모듈은 일반 모듈처럼 __pycache__ 에 바이트코드도 저장됨
+    :param ui_file: .ui 파일 경로
+    :param cache_dir: 생성된 모듈을 저장할 경로, 없으면 .ui 파일 옆의 .uicache
+    :return: (form class, base class)
+    """
+    if cache_dir is None:
+        cache_dir = os.path.join(os.path.dirname(ui_file), CACHE_DIR)
+
+    with open(ui_file, 'rb') as f:
+        digest = hashlib.sha1(f.read()).hexdigest()[:16]
+
+    base_name = os.path.splitext(os.path.basename(ui_file))[0]
+    module_name = 'ui_{}_{}'.format(base_name, digest)
+    module_file = os.path.join(cache_dir, '{}.py'.format(module_name))
+
+    if not os.path.exists(module_file):
+        compile_ui(ui_file, module_file)
+
+    spec = importlib.util.spec_from_file_location(module_name, module_file)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+
+    form_class = next(getattr(module, name) for name in dir(module) if name.startswith('Ui_'))
+    base_class = getattr(importlib.import_module('PyQt5.QtWidgets'), module.BASE_CLASS)
+    return form_class, base_class
+
+
+def compile_ui(ui_file, module_file):
+    from xml.etree import ElementTree
+
+    from PyQt5 import uic
+
+    logging.debug('Compile {} -> {}'.format(ui_file, module_file))
+    cache_dir = os.path.dirname(module_file)
+    os.makedirs(cache_dir, exist_ok=True)
+
+    # 이전 버전의 캐시 삭제
+    prefix = os.path.basename(module_file).rsplit('_', 1)[0] + '_'
+    for name in os.listdir(cache_dir):
+        if name.startswith(prefix) and name.endswith('.py'):
+            os.remove(os.path.join(cache_dir, name))
+
+    base_class = ElementTree.parse(ui_file).getroot().find('widget').get('class')
+
+    tmp_file = module_file + '.tmp'
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        uic.compileUi(ui_file, f)
+        f.write('\nBASE_CLASS = {!r}\n'.format(base_class))
+    os.replace(tmp_file, module_file)
@@ -4,10 +4,8 @@ from functools import partial
 
 from PyQt5.QtWidgets import QPushButton
 
-from utils.file_control import load_value, save_value
-
-
-INIT_DATA = [255, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 254, 254]
+from game.motion_library import EMPTY_NAME, INIT_DATA, slot_key
+from threads.protocol import MotionFrameError, build_motion, encode_motion
 
 
 class ButtonMode(Enum):
@@ -31,12 +29,14 @@ class KinematicWidget:
     max_row = 15
     max_col = 4
     button_mode = ButtonMode.NORMAL
+    loading = False
 
     def __init__(self, parent):
         self.parent = parent
 
         self.buttons = {}
-        self.button_motions = load_value('kinematic', 'button_motions', {})
+        self.motions = parent.motions
+        self.motions.changed.connect(self.on_motion_changed)
         self.setup_kinematic_widget()
 
         self.thread = None
@@ -46,22 +46,14 @@ class KinematicWidget:
 
         for i in range(0, self.max_row):
             for j in range(0, self.max_col):
-                key = '{:02d}_{:02d}'.format(i, j)
-                if key not in self.button_motions.keys():
-                    self.button_motions[key] = {
-                        'name': '-',
-                        'data': [],
-                        'shortcut': None
-                    }
-
-                button = QPushButton(self.button_motions[key]['name'])
+                key = slot_key(i, j)
+                button = QPushButton(self.motions.get(key)['name'])
                 button.clicked.connect(partial(self.button_click, key))
                 self.buttons[key] = button
 
                 # add to the layout
                 layout.addWidget(self.buttons[key], i, j)
 
-        save_value('kinematic', 'button_motions', self.button_motions)
         self.set_buttons_enable(True)
 
         # Button events
@@ -70,52 +62,64 @@ class KinematicWidget:
         self.parent.kinematicDeleteButton.clicked.connect(self.click_delete)
         self.parent.kinematicClearButton.clicked.connect(self.click_clear)
 
-    def get_kinematics_info(self):
-        # header
-        data = [255]
-
-        # data
-        for field in self.fields:
-            item = getattr(self.parent, '{}SpinBox'.format(field))
-            data.append(item.value())
+        # Live Head 가 켜져 있으면 머리 각도를 바꿀 때마다 전송
+        self.parent.headLeftRightSpinBox.valueChanged.connect(self.head_changed)
+        self.parent.headUpDownSpinBox.valueChanged.connect(self.head_changed)
 
-        # end data
-        data.append(254)
-        data.append(254)
+    def on_motion_changed(self, key, old_name, motion):
+        self.buttons[key].setText(motion['name'])
 
-        return data
+    def get_kinematics_info(self):
+        return build_motion(getattr(self.parent, '{}SpinBox'.format(field)).value() for field in self.fields)
 
     def set_kinematics_info(self, data):
         # data
-        for idx, field in enumerate(self.fields):
-            item = getattr(self.parent, '{}SpinBox'.format(field))
-            item.setValue(data[idx + 1])
-
-    def send_data(self, data):
-        if self.parent.serial_thread:
-            self.parent.serial_thread.send_data(data)
+        self.loading = True
+        try:
+            for idx, field in enumerate(self.fields):
+                item = getattr(self.parent, '{}SpinBox'.format(field))
+                item.setValue(data[idx + 1])
+        finally:
+            self.loading = False
+
+    def send_data(self, frame):
+        if frame is None:
+            logging.error('Motion is not valid')
+        elif self.parent.serial_thread:
+            self.parent.serial_thread.send_data(frame)
         else:
             logging.error('Serial is not connected')
 
+    def head_changed(self, _value):
+        # 동작을 불러오면서 바뀐 값은 보내지 않음
+        if self.loading or not self.parent.kinematicOptionLiveHead.isChecked():
+            return
+        if not self.parent.serial_thread:
+            logging.error('Serial is not connected')
+            return
+
+        # Send 버튼과 같은 프레임을 보내고, 드래그 중 쌓인 이전 머리 프레임은 SerialWriter 에서 최신 값으로 대체
+        try:
+            self.parent.serial_thread.send_head(encode_motion(self.get_kinematics_info()))
+        except MotionFrameError as e:
+            logging.error(e)
+
     def click_send_data(self):
-        self.send_data(self.get_kinematics_info())
+        try:
+            self.send_data(encode_motion(self.get_kinematics_info()))
+        except MotionFrameError as e:
+            logging.error(e)
 
     def button_click(self, key):
-        motion = self.button_motions[key]
+        motion = self.motions.get(key)
 
-        if self.button_mode == ButtonMode.SAVE and motion['name'] == '-':
-            self.button_motions[key]['name'] = self.parent.kinematicNameLineEdit.text()
-            self.button_motions[key]['data'] = self.get_kinematics_info()
-            self.buttons[key].setText(self.button_motions[key]['name'])
-            save_value('kinematic', 'button_motions', self.button_motions)
+        if self.button_mode == ButtonMode.SAVE and motion['name'] == EMPTY_NAME:
+            self.motions.set(key, self.parent.kinematicNameLineEdit.text(), self.get_kinematics_info())
             self.after_save()
             return
 
-        if self.button_mode == ButtonMode.DELETE and motion['name'] != '-':
-            self.button_motions[key]['name'] = '-'
-            self.button_motions[key]['data'] = INIT_DATA
-            self.buttons[key].setText(self.button_motions[key]['name'])
-            save_value('kinematic', 'button_motions', self.button_motions)
+        if self.button_mode == ButtonMode.DELETE and motion['name'] != EMPTY_NAME:
+            self.motions.clear(key)
             self.after_delete()
             return
 
@@ -123,10 +127,10 @@ class KinematicWidget:
             self.set_kinematics_info(motion['data'])
             self.parent.kinematicNameLineEdit.setText(motion['name'])
         elif self.parent.kinematicOptionSend.isChecked():
-            self.send_data(motion['data'])
+            self.send_data(self.motions.frame(key))
         elif self.parent.kinematicOptionLoadAndSend.isChecked():
             self.set_kinematics_info(motion['data'])
-            self.send_data(motion['data'])
+            self.send_data(self.motions.frame(key))
 
     def set_buttons_enable(self, flag):
         """
@@ -137,11 +141,8 @@ class KinematicWidget:
         """
         for i in range(0, self.max_row):
             for j in range(0, self.max_col):
-                key = '{:02d}_{:02d}'.format(i, j)
-                if flag:
-                    self.buttons[key].setEnabled(self.buttons[key].text() != '-')
-                else:
-                    self.buttons[key].setEnabled(self.buttons[key].text() == '-')
+                key = slot_key(i, j)
+                self.buttons[key].setEnabled(self.motions.is_empty(key) != flag)
 
     def click_save(self):
         if self.button_mode == ButtonMode.NORMAL:
@@ -166,7 +167,6 @@ class KinematicWidget:
         self.parent.kinematicDeleteButton.setEnabled(True)
         self.parent.kinematicClearButton.setEnabled(True)
         self.set_buttons_enable(True)
-        self.parent.macro.update_kinematic()
         self.parent.kinematicsWidget.update()
 
     def click_delete(self):
@@ -188,7 +188,6 @@ class KinematicWidget:
         self.parent.kinematicSaveButton.setEnabled(True)
         self.parent.kinematicClearButton.setEnabled(True)
         self.set_buttons_enable(True)
-        self.parent.macro.update_kinematic()
         self.parent.kinematicsWidget.update()
 
     def click_clear(self):
@@ -7,7 +7,8 @@ from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QStandardItemModel, QStandardItem
 
 from game.macro import MacroThread
-from utils import sublist, save_value, load_value
+from game.speech import Speech, SpeechError
+from utils import save_value, load_value
 
 
 class MacroWidget:
@@ -19,20 +20,35 @@ class MacroWidget:
         self.macroModel = None
         self.setup_macro_widget()
 
-        self.button_motions = {}
+        self.motions = parent.motions
+        self.motions.changed.connect(self.on_motion_changed)
         self.update_kinematic()
 
+        self.speech = self.setup_speech()
         self.thread = None
 
+    @staticmethod
+    def setup_speech():
+        backend = load_value('tts', 'backend', 'espeak')
+        voice = load_value('tts', 'voice', None)
+        try:
+            return Speech(backend, voice)
+        except SpeechError as e:
+            logging.error('TTS backend "{}" is not available, use silent stub: {}'.format(backend, e))
+            return Speech('stub', voice)
+
     def update_kinematic(self):
-        self.button_motions = load_value('kinematic', 'button_motions', {})
-        self.parent.macroCommandComboBox.clear()
+        combo_box = self.parent.macroCommandComboBox
+        current = combo_box.currentText()
 
         # Add command list into combobox
-        for key in self.button_motions.keys():
-            if sublist(['name', 'data'], self.button_motions[key].keys()):
-                if self.button_motions[key]['name'] != '-':
-                    self.parent.macroCommandComboBox.addItem(self.button_motions[key]['name'])
+        combo_box.clear()
+        combo_box.addItems(self.motions.names())
+        combo_box.setCurrentIndex(max(combo_box.findText(current), 0))
+
+    def on_motion_changed(self, key, old_name, motion):
+        if old_name != motion['name']:
+            self.update_kinematic()
 
     def setup_macro_widget(self):
         # Create an empty model for the list's data
@@ -70,10 +86,11 @@ class MacroWidget:
 
     def insert_command(self):
         name = self.parent.macroCommandComboBox.currentText()
-        for key in self.button_motions.keys():
-            if self.button_motions[key]['name'] == name:
-                data = self.button_motions[key]['data']
-        self.append_row_to_model('motion', name, data)
+        motion = self.motions.by_name(name)
+        if motion is None:
+            logging.error('Unknown motion: {}'.format(name))
+            return
+        self.append_row_to_model('motion', name, motion['data'])
 
     def insert_delay(self):
         delay = self.parent.macroDelaySpinBox.value()
@@ -128,6 +145,9 @@ class MacroWidget:
         for item in new_data:
             self.append_row_to_model(item['command'], item['name'], item['data'], item['checked'])
 
+        # 실행 전에 음성을 미리 합성
+        self.speech.prefetch([item['data'] for item in new_data if item['command'] == 'tts' and item['checked']])
+
     def clear(self):
         self.macroData = []
         self.macroModel.clear()
@@ -135,10 +155,13 @@ class MacroWidget:
         self.macroModel.setHorizontalHeaderLabels(['', 'Name', 'Data'])
 
     def start(self):
+        # tts 합성이 끝나지 않았을 수 있으므로 컴파일은 MacroThread 에서 하고, 실패하면 macro_finished 로 돌아옴
+        thread = MacroThread(self.parent, self.speech)
+        thread.set_data(self.macroData)
+
         logging.info('Macro Start')
         self.update_widget(True)
-        self.thread = MacroThread(self.parent)
-        self.thread.set_data(self.macroData)
+        self.thread = thread
         self.thread.start()
 
     def stop(self):